@@ -9,10 +9,27 @@ Flask backend that provides:
 """
 
 import os
-import uuid
+import sys
+import glob
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import secrets
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, jsonify, request, Response
+import orjson
+import msgpack
+from flask import Flask, jsonify, request, Response, send_file
+from flask.json.provider import DefaultJSONProvider
+from flask.logging import default_handler
 from flask_cors import CORS
+from flask_compress import Compress
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from flasgger import Swagger
 
@@ -20,12 +37,15 @@ from flasgger import Swagger
 from config import Config
 
 # Import services
-from services.ocr_service import get_ocr_service, extract_glucose_values
+from services.ocr_service import get_ocr_service, OCRBatchQueue, OCRQueueFull
 from services.classification_service import (
     classify_glucose,
     classify_multiple,
+    classify_multiple_iter,
+    summarize_classifications,
     get_all_thresholds,
-    get_recommendation
+    get_recommendation,
+    DISCLAIMER as CLASSIFICATION_DISCLAIMER
 )
 from services.validation_service import (
     validate_glucose_report,
@@ -41,16 +61,82 @@ from services.ml_predictor import (
     check_model_status,
     get_feature_importance
 )
-from services.database_service import get_database_service
-from services.pdf_service import get_pdf_service
+from services.database_service import (
+    get_database_service,
+    close_database_service,
+    is_valid_analysis_id,
+)
+from services.cache_service import AnalysisCache, CACHE_MODES
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, used by jsonify and request.get_json."""
+
+    # numpy scalars/arrays from the ML and SHAP services serialize without conversion
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same argument rules as jsonify(), spelled out rather than relying on
+        # Flask's private helper
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        if not args and not kwargs:
+            obj = None
+        elif len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs
+        # Hand orjson's bytes straight to the response instead of round-tripping via str
+        body = orjson.dumps(obj, default=self.default, option=self.OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
 
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config.from_object(Config)
 
-# Enable CORS for all routes
-CORS(app, resources={r"/*": {"origins": Config.CORS_ORIGINS}})
+# Request threads only enqueue log records; a listener thread does the stderr writes
+log_queue = queue.SimpleQueue()
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(log_queue_handler)
+log_listener = logging.handlers.QueueListener(log_queue, default_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+
+def restart_log_listener():
+    """Give a forked worker its own log queue and listener thread."""
+    # Threads do not survive fork(); records still queued belong to the parent, which flushes them
+    fresh_queue = queue.SimpleQueue()
+    log_queue_handler.queue = fresh_queue
+    log_listener.queue = fresh_queue
+    log_listener.start()
+
+
+os.register_at_fork(after_in_child=restart_log_listener)
+
+# Checkpoints the WAL and releases the per-thread SQLite connections on exit
+atexit.register(close_database_service)
+
+# Enable CORS for all routes; preflights are cached by the browser for CORS_MAX_AGE
+CORS(
+    app,
+    origins=Config.CORS_ORIGINS,
+    methods=['GET', 'POST', 'DELETE'],
+    allow_headers=['Content-Type', 'Authorization'],
+    max_age=Config.CORS_MAX_AGE
+)
+
+# Compress JSON responses for clients that accept br/gzip (see COMPRESS_* in Config)
+Compress(app)
 
 # Initialize Swagger / Flasgger
 swagger_template = {
@@ -95,34 +181,616 @@ swagger_config = {
     "swagger_ui": True,
     "specs_route": "/api/docs/",
 }
-Swagger(app, template=swagger_template, config=swagger_config)
+if Config.ENABLE_SWAGGER:
+    Swagger(app, template=swagger_template, config=swagger_config)
 
-# Ensure upload folder exists
+# Ensure upload and PDF cache folders exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(Config.PDF_CACHE_DIR, exist_ok=True)
+
+# Content-hash cache of serialized /api/analyze response bodies
+analysis_cache = AnalysisCache(
+    maxsize=Config.ANALYSIS_CACHE_SIZE,
+    ttl_s=Config.ANALYSIS_CACHE_TTL or None
+)
+
+# Serialized /api/trends bodies, keyed by ETag and query; the ETag carries the
+# history version and minute, so a save or delete is seen on the next request
+trends_cache = AnalysisCache(maxsize=128, ttl_s=60)
+
+# Concurrent /api/analyze requests share one OCR worker via micro-batches
+ocr_queue = OCRBatchQueue(
+    batch_size=Config.OCR_BATCH_SIZE,
+    max_pending=Config.OCR_MAX_PENDING
+)
+
+# Background jobs for /api/analyze/async: job_id -> (submitted_at, Future)
+analysis_executor = ThreadPoolExecutor(
+    max_workers=Config.ANALYSIS_WORKERS,
+    thread_name_prefix='analysis'
+)
+analysis_jobs = {}
+analysis_jobs_lock = threading.Lock()
+# Queued or running async jobs count against the OCR backlog limit too;
+# the executor's own queue is unbounded (None when OCR_MAX_PENDING is 0)
+analysis_job_slots = (
+    threading.BoundedSemaphore(Config.OCR_MAX_PENDING) if Config.OCR_MAX_PENDING else None
+)
+
+# PDF renders in progress: cache path -> Future, so concurrent downloads share one render
+pdf_renders = {}
+pdf_renders_lock = threading.Lock()
+
+# Last /api/health report: (computed_at, body bytes, status code)
+health_cache = (float('-inf'), b'', 200)
+health_cache_lock = threading.Lock()
+
+# Lower-cased allowed upload extensions, and their listing for error messages
+ALLOWED_EXTENSIONS = frozenset(ext.lower() for ext in Config.ALLOWED_EXTENSIONS)
+ALLOWED_EXTENSIONS_DISPLAY = ', '.join(sorted(ALLOWED_EXTENSIONS))
+
+# Read size used when streaming uploads to disk; small enough that many
+# concurrent uploads on a gthread worker don't each pin a large buffer
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Linux can sendfile() between regular files, letting the kernel copy spooled uploads
+SENDFILE_UPLOADS = sys.platform.startswith('linux') and hasattr(os, 'sendfile')
+
+# Leading bytes of the allowed image formats (PNG, JPEG, GIF, BMP)
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'BM')
+
+# Required body fields for the JSON endpoints, and accepted saved-analysis types
+MANUAL_INPUT_FIELDS = ('test_type', 'value')
+ANALYSIS_TYPES = frozenset({'ocr', 'manual', 'risk'})
+
+# Optional /api/save-analysis fields and the JSON types each accepts (null is always allowed)
+SAVE_ANALYSIS_FIELDS = {
+    'input_data': ((dict, list), 'an object or array'),
+    'result_data': ((dict, list), 'an object or array'),
+    'test_type': ((str,), 'a string'),
+    'glucose_value': ((int, float), 'a number'),
+    'classification': ((str,), 'a string'),
+    'risk_category': ((str,), 'a string'),
+    'risk_percentage': ((int, float), 'a number'),
+    'label': ((str,), 'a string'),
+}
+
+# Representative input used to exercise the prediction path during warmup
+WARMUP_RISK_INPUT = {'glucose': 100, 'bmi': 25.0, 'age': 40, 'blood_pressure': 80}
+
+
+def warmup_services():
+    """Load the OCR engine and ML model so the first real request is not a cold start."""
+    get_ocr_service()
+    if check_model_status().get('initialized'):
+        # One dummy prediction primes the scaler and tree traversal code paths
+        predict_diabetes_risk(WARMUP_RISK_INPUT)
+
+
+# Runs at import so it also happens under gunicorn/uwsgi, where __main__ never executes
+if app.config.get('WARMUP', True):
+    warmup_services()
 
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
 def generate_unique_filename(original_filename):
     """Generate a unique filename to prevent overwrites."""
     ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else 'png'
-    unique_name = f"{uuid.uuid4().hex}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{ext}"
-    return unique_name
+    return f"{secrets.token_hex(16)}.{ext}"
+
+
+def save_upload(file, filepath):
+    """
+    Stream an uploaded file to disk, hashing it in the same pass.
+
+    The content is checked against known image signatures before anything is
+    written, and the write is abandoned once the size limit is exceeded, so
+    rejected uploads never leave a file behind.
+
+    Returns:
+        Dictionary with success flag and 'sha256' digest, or 'error' and 'status_code'
+    """
+    max_size = app.config['MAX_CONTENT_LENGTH']
+    chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+
+    if not chunk.startswith(IMAGE_SIGNATURES):
+        return {
+            "success": False,
+            "error": "File content is not a supported image (PNG, JPG, GIF, BMP)",
+            "status_code": 400
+        }
+
+    # Werkzeug spools parts over 500KB to a temp file; copy those in the kernel
+    if SENDFILE_UPLOADS and getattr(file.stream, '_rolled', False):
+        return copy_spooled_upload(file.stream, filepath, max_size)
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(filepath, 'wb') as out:
+        while chunk:
+            size += len(chunk)
+            if size > max_size:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+
+    if size > max_size:
+        cleanup_file(filepath)
+        return {
+            "success": False,
+            "error": "File too large",
+            "status_code": 413
+        }
+
+    return {"success": True, "sha256": digest.hexdigest()}
+
+
+def copy_spooled_upload(stream, filepath, max_size):
+    """
+    Copy an upload that Werkzeug already spooled to disk using os.sendfile.
+
+    The bytes move file-to-file inside the kernel; only the hashing pass
+    reads them into userspace.
+
+    Returns:
+        Same dictionary as save_upload()
+    """
+    src_fd = stream.fileno()
+    size = os.fstat(src_fd).st_size
+    if size > max_size:
+        return {
+            "success": False,
+            "error": "File too large",
+            "status_code": 413
+        }
+
+    with open(src_fd, 'rb', closefd=False) as src:
+        src.seek(0)
+        digest = hashlib.file_digest(src, 'sha256')
+
+    with open(filepath, 'wb') as out:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(out.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+    return {"success": True, "sha256": digest.hexdigest()}
+
+
+def receive_upload():
+    """
+    Validate the 'file' part of the current request and stream it to UPLOAD_FOLDER.
+
+    Returns:
+        Tuple of (upload_info, error_response). upload_info holds filename,
+        original_filename, filepath and sha256; when the upload is rejected it
+        is None and error_response is a (response, status_code) pair.
+    """
+    # Parsing the body raises once it exceeds MAX_CONTENT_LENGTH; answered here
+    # because the routes' blanket except would otherwise turn it into a 500
+    try:
+        files = request.files
+    except RequestEntityTooLarge as e:
+        return None, request_entity_too_large(e)
+
+    if 'file' not in files:
+        return None, (jsonify({
+            "success": False,
+            "error": "No file part in request"
+        }), 400)
+
+    file = files['file']
+
+    if file.filename == '':
+        return None, (jsonify({
+            "success": False,
+            "error": "No file selected"
+        }), 400)
+
+    if not allowed_file(file.filename):
+        return None, (jsonify({
+            "success": False,
+            "error": f"File type not allowed. Allowed types: {ALLOWED_EXTENSIONS_DISPLAY}"
+        }), 400)
+
+    # The stored name is random; only the already-validated extension comes
+    # from the client, so secure_filename is needed just for the echoed name
+    filename = generate_unique_filename(file.filename)
+    original_filename = secure_filename(file.filename)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+    saved = save_upload(file, filepath)
+    if not saved['success']:
+        return None, (jsonify({
+            "success": False,
+            "error": saved['error']
+        }), saved['status_code'])
+
+    return {
+        "filename": filename,
+        "original_filename": original_filename,
+        "filepath": filepath,
+        "sha256": saved['sha256']
+    }, None
+
+
+def parse_cache_options():
+    """
+    Read the cache / max_age_s query parameters of the analyze endpoints.
+
+    Returns:
+        Tuple of (cache_mode, max_age_s, error_response)
+    """
+    cache_mode = request.args.get('cache', 'on')
+    if cache_mode not in CACHE_MODES:
+        return None, None, (jsonify({
+            "success": False,
+            "error": f"cache must be one of: {', '.join(CACHE_MODES)}"
+        }), 400)
+
+    return cache_mode, request.args.get('max_age_s', None, type=float), None
+
+
+def parse_json_body(required_fields=()):
+    """
+    Read the request body as a JSON object and check for required fields.
+
+    Malformed JSON, a non-object body, or a wrong Content-Type are reported
+    as 400s instead of surfacing as server errors.
+
+    Returns:
+        Tuple of (data, error_response)
+    """
+    # Parsed once by the orjson provider; not kept on the request since callers hold the result
+    data = request.get_json(silent=True, cache=False)
+    if not data or not isinstance(data, dict):
+        return None, (jsonify({
+            "success": False,
+            "error": "No JSON data provided"
+        }), 400)
+
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        return None, (jsonify({
+            "success": False,
+            "error": f"Missing required fields: {', '.join(missing_fields)}"
+        }), 400)
+
+    return data, None
+
+
+def run_analysis_pipeline(filepath, content_hash, cache_mode='on'):
+    """
+    Run OCR, report validation and classification on a saved upload.
+
+    The upload is removed once OCR has read it. Completed analyses are stored
+    in the content-hash cache unless cache_mode is 'read_only' or 'off'.
+
+    Returns:
+        Tuple of (response_dict, status_code)
+    """
+    # Step 1: Extract text and glucose values using OCR
+    try:
+        ocr_result = ocr_queue.predict(filepath)
+    except OCRQueueFull:
+        return {
+            "success": False,
+            "error": "OCR queue is full",
+            "message": "Too many reports are being analyzed right now. Please try again shortly."
+        }, 429
+    finally:
+        cleanup_file(filepath)
+
+    if not ocr_result.get('extraction_success', False):
+        return {
+            "success": False,
+            "error": ocr_result.get('error', 'OCR extraction failed'),
+            "message": "Failed to extract text from the image. Please ensure the image is clear and readable."
+        }, 400
+
+    extracted_text = ocr_result.get('raw_text', '')
+
+    # Step 2: Validate as glucose report
+    validation_result = comprehensive_validation(extracted_text)
+
+    # Step 3: Get detected glucose values from OCR
+    detected_values = ocr_result.get('detected_values', [])
+
+    if not validation_result['is_valid']:
+        result = {
+            "success": False,
+            "is_valid_report": False,
+            "validation": validation_result,
+            "extracted_text": extracted_text,
+            "message": validation_result.get('message', 'This does not appear to be a glucose report.')
+        }
+    elif not detected_values:
+        result = {
+            "success": True,
+            "is_valid_report": True,
+            "validation": validation_result,
+            "extracted_text": extracted_text,
+            "detected_values": [],
+            "classifications": [],
+            "message": "Report validated as glucose report, but no specific glucose values could be extracted. "
+                      "The image may need to be clearer, or you can enter values manually."
+        }
+    else:
+        # Step 4: Classify all detected glucose values in one batch
+        batch = classify_multiple(detected_values)
+        classifications = [
+            {"detected": value_info, "classification": classification}
+            for value_info, classification in zip(detected_values, batch['results'])
+            if classification.get('success')
+        ]
+
+        # Step 5: Generate summary
+        if classifications:
+            # Check for concerning results
+            severity_levels = [c['classification'].get('severity', 'low') for c in classifications]
+
+            if 'high' in severity_levels:
+                summary = "Analysis complete. Some values are in the diabetes range. Please consult a healthcare provider."
+            elif 'moderate' in severity_levels:
+                summary = "Analysis complete. Some values indicate prediabetes or need monitoring. Consider consulting a healthcare provider."
+            else:
+                summary = "Analysis complete. Values appear to be within normal range."
+        else:
+            summary = "Analysis complete. No classifiable glucose values found."
+
+        result = {
+            "success": True,
+            "is_valid_report": True,
+            "validation": validation_result,
+            "extracted_text": extracted_text,
+            "detected_values": detected_values,
+            "classifications": classifications,
+            "summary": summary,
+            "analysis_timestamp": iso_now(),
+            "disclaimer": CLASSIFICATION_DISCLAIMER
+        }
+
+    if cache_mode == 'on':
+        # Stored serialized: a hit is then sent as-is, with no dict walk or encode
+        analysis_cache.set(content_hash, orjson.dumps(result, option=ORJSONProvider.OPTIONS))
+
+    return result, 200
+
+
+def register_analysis_job(future):
+    """Track a background analysis, dropping finished jobs older than ANALYSIS_JOB_TTL."""
+    now = time.monotonic()
+    job_id = secrets.token_hex(16)
+
+    with analysis_jobs_lock:
+        expired = [
+            jid for jid, (submitted_at, job) in analysis_jobs.items()
+            if job.done() and now - submitted_at > Config.ANALYSIS_JOB_TTL
+        ]
+        for jid in expired:
+            del analysis_jobs[jid]
+
+        analysis_jobs[job_id] = (now, future)
+
+    return job_id
+
+
+def run_analysis_job(filepath, content_hash, cache_mode):
+    """Run the analysis pipeline for an async job, then free its backlog slot."""
+    try:
+        return run_analysis_pipeline(filepath, content_hash, cache_mode)
+    finally:
+        if analysis_job_slots is not None:
+            analysis_job_slots.release()
+
+
+# (epoch second, ISO string) of the last timestamp formatted by iso_now()
+_iso_now_cache = (0, '')
+
+
+def iso_now():
+    """
+    Current local time as an ISO 8601 string, at one-second resolution.
+
+    The formatted string is reused for every call within the same second.
+    The cache is swapped as a single tuple, so concurrent callers at worst
+    format the same second twice.
+    """
+    global _iso_now_cache
+    now = int(time.time())
+    cached_at, formatted = _iso_now_cache
+    if now != cached_at:
+        formatted = datetime.fromtimestamp(now).isoformat()
+        _iso_now_cache = (now, formatted)
+    return formatted
+
+
+def ensure_pdf_report(analysis, pdf_path):
+    """
+    Make sure a rendered report exists at pdf_path.
+
+    The first request for a missing report renders it; requests that arrive
+    while that render is running wait for it instead of starting their own.
+    """
+    try:
+        # Touching a served report keeps it out of the next prune
+        os.utime(pdf_path)
+        return
+    except FileNotFoundError:
+        pass
+
+    with pdf_renders_lock:
+        future = pdf_renders.get(pdf_path)
+        if future is None:
+            # A render may have finished between the check above and taking the lock
+            if os.path.exists(pdf_path):
+                return
+            future = Future()
+            pdf_renders[pdf_path] = future
+            is_renderer = True
+        else:
+            is_renderer = False
+
+    if not is_renderer:
+        future.result()
+        return
+
+    try:
+        render_pdf_report(analysis, pdf_path)
+        future.set_result(None)
+        prune_pdf_cache(keep=pdf_path)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with pdf_renders_lock:
+            del pdf_renders[pdf_path]
+
+
+def render_pdf_report(analysis, pdf_path):
+    """
+    Render an analysis report into PDF_CACHE_DIR.
+
+    The PDF is written to a temporary file next to pdf_path and renamed into
+    place, so concurrent requests never serve a partially written report.
+    """
+    # Deferred so ReportLab is only loaded once a report is requested
+    from services.pdf_service import get_pdf_service
+
+    with tempfile.NamedTemporaryFile(
+        suffix='.pdf.tmp', dir=Config.PDF_CACHE_DIR, delete=False
+    ) as f:
+        tmp_path = f.name
+        try:
+            get_pdf_service().generate_report(analysis, f)
+        except Exception:
+            f.close()
+            cleanup_file(tmp_path)
+            raise
+
+    os.replace(tmp_path, pdf_path)
+
+
+def prune_pdf_cache(keep):
+    """Remove the least recently served reports beyond PDF_CACHE_MAX_FILES, never keep itself."""
+    if not Config.PDF_CACHE_MAX_FILES:
+        return
+
+    reports = []
+    with os.scandir(Config.PDF_CACHE_DIR) as entries:
+        for entry in entries:
+            # In-progress renders are *.pdf.tmp and are left alone
+            if not entry.name.endswith('.pdf') or entry.path == keep:
+                continue
+            try:
+                reports.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass
+
+    excess = len(reports) + 1 - Config.PDF_CACHE_MAX_FILES
+    if excess > 0:
+        reports.sort()
+        for _, path in reports[:excess]:
+            cleanup_file(path)
 
 
 def cleanup_file(filepath):
     """Remove a file if it exists."""
+    if not filepath:
+        return
+
     try:
-        if filepath and os.path.exists(filepath):
-            os.remove(filepath)
-    except Exception as e:
+        os.unlink(filepath)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
         app.logger.warning(f"Failed to cleanup file {filepath}: {e}")
 
 
+def precompute_json(result):
+    """
+    Serialize a static reference payload once.
+
+    Returns:
+        Tuple of (JSON body bytes, ETag derived from the body)
+    """
+    body = orjson.dumps(dict(result, success=True), option=ORJSONProvider.OPTIONS)
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+def not_modified(etag):
+    """
+    Answer a conditional GET whose If-None-Match already holds etag.
+
+    Returns:
+        A 304 response, or None when the client needs the full body
+    """
+    # Flask-Compress sends strong ETags of compressed bodies as '<etag>:<algorithm>'
+    for candidate in (etag, *(f"{etag}:{algorithm}" for algorithm in Config.COMPRESS_ALGORITHM)):
+        if request.if_none_match.contains(candidate):
+            response = Response(status=304)
+            response.set_etag(candidate)
+            return response
+
+    return None
+
+
+def negotiate_mimetype():
+    """Pick JSON or MessagePack for a response from the client's Accept header."""
+    return request.accept_mimetypes.best_match(API_MIMETYPES) or 'application/json'
+
+
+def encode_body(result, mimetype):
+    """Serialize a response payload in the negotiated format."""
+    if mimetype == 'application/msgpack':
+        return msgpack.packb(result, use_bin_type=True)
+    return orjson.dumps(result, option=ORJSONProvider.OPTIONS)
+
+
+def static_json_response(static):
+    """Serve a precomputed JSON body with caching headers, answering 304 on ETag match."""
+    body, etag = static
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = REFERENCE_MAX_AGE
+    return response.make_conditional(request)
+
+
+# Reference data never changes while the process runs, so it is serialized at import
+REFERENCE_MAX_AGE = 86400
+THRESHOLDS_JSON = precompute_json(get_all_thresholds())
+SUPPORTED_TESTS_JSON = precompute_json(get_supported_report_types())
+PREDICTION_REQUIREMENTS_JSON = precompute_json(get_input_requirements())
+PREDICTION_THRESHOLDS_JSON = precompute_json(get_prediction_thresholds())
+
+# Formats /api/history and /api/trends can produce, JSON first for browsers
+API_MIMETYPES = ['application/json', 'application/msgpack']
+
+# Formats /api/history/stream can produce, preferred first when the client has no preference
+HISTORY_STREAM_MIMETYPES = ['application/json', 'application/x-ndjson']
+
+# Seconds clients may reuse a /api/trends response without revalidating
+TRENDS_MAX_AGE = 30
+
+# Seconds clients may reuse a downloaded PDF report without revalidating
+PDF_MAX_AGE = 86400
+
+# Closing fragment of the streamed /api/manual-input/batch body
+BATCH_DISCLAIMER_JSON = b',"disclaimer":' + orjson.dumps(CLASSIFICATION_DISCLAIMER) + b'}'
+
+# Feature importance is fixed once the model has loaded, so it is serialized on first success
+feature_importance_json = None
+
+
 # ============================================
 # Health Check Endpoints
 # ============================================
@@ -165,7 +833,9 @@ def health_check():
     tags:
       - Health
     summary: Detailed system health check
-    description: Checks OCR service, ML model, and uploads folder status.
+    description: |
+      Checks OCR service, ML model, and uploads folder status. The report is
+      reused for HEALTH_CACHE_TTL seconds so frequent probes stay cheap.
     responses:
       200:
         description: Health status report
@@ -201,6 +871,23 @@ def health_check():
       500:
         description: Health check error
     """
+    global health_cache
+
+    computed_at, body, status_code = health_cache
+    if time.monotonic() - computed_at >= Config.HEALTH_CACHE_TTL:
+        with health_cache_lock:
+            # Another thread may have refreshed it while this one waited
+            computed_at, body, status_code = health_cache
+            if time.monotonic() - computed_at >= Config.HEALTH_CACHE_TTL:
+                report, status_code = build_health_report()
+                body = orjson.dumps(report, option=ORJSONProvider.OPTIONS)
+                health_cache = (time.monotonic(), body, status_code)
+
+    return Response(body, status=status_code, mimetype='application/json')
+
+
+def build_health_report():
+    """Run the OCR, ML model and uploads folder checks behind /api/health."""
     try:
         # Check OCR service
         ocr_service = get_ocr_service()
@@ -214,9 +901,10 @@ def health_check():
 
         # Check uploads folder
         uploads_folder = app.config['UPLOAD_FOLDER']
+        uploads_exists = os.path.exists(uploads_folder)
         uploads_status = {
-            "exists": os.path.exists(uploads_folder),
-            "writable": os.access(uploads_folder, os.W_OK) if os.path.exists(uploads_folder) else False
+            "exists": uploads_exists,
+            "writable": uploads_exists and os.access(uploads_folder, os.W_OK)
         }
 
         # Determine overall status
@@ -227,9 +915,9 @@ def health_check():
             uploads_status['writable']
         )
 
-        return jsonify({
+        return {
             "status": "healthy" if all_healthy else "degraded",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_now(),
             "services": {
                 "ocr": ocr_status,
                 "ml_model": {
@@ -239,14 +927,14 @@ def health_check():
                 },
                 "uploads": uploads_status
             }
-        })
+        }, 200
 
     except Exception as e:
         app.logger.error(f"Health check error: {e}")
-        return jsonify({
+        return {
             "status": "error",
             "error": str(e)
-        }), 500
+        }, 500
 
 
 # ============================================
@@ -282,46 +970,25 @@ def upload_file():
               type: string
             original_filename:
               type: string
+            sha256:
+              type: string
+              description: SHA-256 hex digest of the uploaded bytes
       400:
-        description: Missing file or invalid file type
+        description: Missing file, invalid file type, or content is not an image
+      413:
+        description: File too large
       500:
         description: Server error
     """
     try:
-        if 'file' not in request.files:
-            return jsonify({
-                "success": False,
-                "error": "No file part in request"
-            }), 400
-
-        file = request.files['file']
-
-        if file.filename == '':
-            return jsonify({
-                "success": False,
-                "error": "No file selected"
-            }), 400
-
-        if not allowed_file(file.filename):
-            return jsonify({
-                "success": False,
-                "error": f"File type not allowed. Allowed types: {', '.join(Config.ALLOWED_EXTENSIONS)}"
-            }), 400
-
-        # Generate unique filename
-        original_filename = secure_filename(file.filename)
-        filename = generate_unique_filename(original_filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-
-        # Save file
-        file.save(filepath)
+        upload, error_response = receive_upload()
+        if error_response:
+            return error_response
 
         return jsonify({
             "success": True,
             "message": "File uploaded successfully",
-            "filename": filename,
-            "original_filename": original_filename,
-            "filepath": filepath
+            **upload
         })
 
     except Exception as e:
@@ -349,6 +1016,9 @@ def analyze_report():
       2. Extract text using PaddleOCR
       3. Validate as a glucose report
       4. Extract and classify glucose values per ADA guidelines
+
+      Results are cached by the SHA-256 of the uploaded bytes, so re-uploading
+      an identical image returns the previous analysis without running OCR.
     consumes:
       - multipart/form-data
     parameters:
@@ -357,6 +1027,16 @@ def analyze_report():
         type: file
         required: true
         description: Lab report image (PNG, JPG, JPEG, GIF, BMP). Max 16MB.
+      - name: cache
+        in: query
+        type: string
+        enum: [on, read_only, off]
+        default: "on"
+        description: Use and populate the result cache, only read from it, or bypass it
+      - name: max_age_s
+        in: query
+        type: number
+        description: Ignore cached results older than this many seconds
     responses:
       200:
         description: Analysis result
@@ -389,135 +1069,224 @@ def analyze_report():
             analysis_timestamp:
               type: string
               format: date-time
+            disclaimer:
+              type: string
+              description: Medical disclaimer covering every classification
       400:
         description: No file provided, invalid type, or OCR extraction failed
+      413:
+        description: File too large
+      429:
+        description: Too many analyses already waiting for OCR
       500:
         description: Server error
     """
     filepath = None
 
     try:
-        # Check for file in request
-        if 'file' not in request.files:
-            return jsonify({
-                "success": False,
-                "error": "No file part in request"
-            }), 400
+        cache_mode, max_age_s, error_response = parse_cache_options()
+        if error_response:
+            return error_response
 
-        file = request.files['file']
+        # Save file temporarily
+        upload, error_response = receive_upload()
+        if error_response:
+            return error_response
 
-        if file.filename == '':
-            return jsonify({
-                "success": False,
-                "error": "No file selected"
-            }), 400
+        filepath = upload['filepath']
 
-        if not allowed_file(file.filename):
-            return jsonify({
-                "success": False,
-                "error": f"File type not allowed. Allowed types: {', '.join(Config.ALLOWED_EXTENSIONS)}"
-            }), 400
+        # Identical image analyzed before: skip the pipeline
+        if cache_mode != 'off':
+            cached = analysis_cache.get(upload['sha256'], max_age_s=max_age_s)
+            if cached is not None:
+                cleanup_file(filepath)
+                return Response(cached, mimetype='application/json')
 
-        # Save file temporarily
-        original_filename = secure_filename(file.filename)
-        filename = generate_unique_filename(original_filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        result, status_code = run_analysis_pipeline(filepath, upload['sha256'], cache_mode)
+        return jsonify(result), status_code
 
-        # Step 1: Extract text and glucose values using OCR
-        ocr_result = extract_glucose_values(filepath)
+    except Exception as e:
+        app.logger.error(f"Analysis error: {e}")
+        cleanup_file(filepath)
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "An error occurred during analysis. Please try again."
+        }), 500
 
-        if not ocr_result.get('extraction_success', False):
-            cleanup_file(filepath)
-            return jsonify({
-                "success": False,
-                "error": ocr_result.get('error', 'OCR extraction failed'),
-                "message": "Failed to extract text from the image. Please ensure the image is clear and readable."
-            }), 400
 
-        extracted_text = ocr_result.get('raw_text', '')
+@app.route('/api/analyze/async', methods=['POST'])
+def analyze_report_async():
+    """Start a background analysis of a lab report image
+    ---
+    tags:
+      - Analysis
+    summary: Start a background analysis
+    description: |
+      Same input and pipeline as /api/analyze, but returns a job id right away
+      instead of holding the connection open during OCR. Poll
+      /api/analyze/result/{job_id} for the outcome.
+    consumes:
+      - multipart/form-data
+    parameters:
+      - name: file
+        in: formData
+        type: file
+        required: true
+        description: Lab report image (PNG, JPG, JPEG, GIF, BMP). Max 16MB.
+      - name: cache
+        in: query
+        type: string
+        enum: [on, read_only, off]
+        default: "on"
+        description: Use and populate the result cache, only read from it, or bypass it
+      - name: max_age_s
+        in: query
+        type: number
+        description: Ignore cached results older than this many seconds
+    responses:
+      202:
+        description: Analysis accepted
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            job_id:
+              type: string
+            status:
+              type: string
+              example: pending
+      400:
+        description: No file provided or invalid type
+      413:
+        description: File too large
+      429:
+        description: Too many analyses already waiting for OCR
+      500:
+        description: Server error
+    """
+    filepath = None
+
+    # Claimed before the upload is written, so a rejected request leaves nothing on disk
+    if analysis_job_slots is not None and not analysis_job_slots.acquire(blocking=False):
+        return jsonify({
+            "success": False,
+            "error": "OCR queue is full",
+            "message": "Too many reports are being analyzed right now. Please try again shortly."
+        }), 429
+    submitted = False
 
-        # Step 2: Validate as glucose report
-        validation_result = comprehensive_validation(extracted_text)
+    try:
+        cache_mode, max_age_s, error_response = parse_cache_options()
+        if error_response:
+            return error_response
 
-        if not validation_result['is_valid']:
-            cleanup_file(filepath)
-            return jsonify({
-                "success": False,
-                "is_valid_report": False,
-                "validation": validation_result,
-                "extracted_text": extracted_text,
-                "message": validation_result.get('message', 'This does not appear to be a glucose report.')
-            })
+        upload, error_response = receive_upload()
+        if error_response:
+            return error_response
 
-        # Step 3: Get detected glucose values from OCR
-        detected_values = ocr_result.get('detected_values', [])
+        filepath = upload['filepath']
 
-        if not detected_values:
+        cached = None
+        if cache_mode != 'off':
+            cached = analysis_cache.get(upload['sha256'], max_age_s=max_age_s)
+
+        if cached is not None:
             cleanup_file(filepath)
-            return jsonify({
-                "success": True,
-                "is_valid_report": True,
-                "validation": validation_result,
-                "extracted_text": extracted_text,
-                "detected_values": [],
-                "classifications": [],
-                "message": "Report validated as glucose report, but no specific glucose values could be extracted. "
-                          "The image may need to be clearer, or you can enter values manually."
-            })
-
-        # Step 4: Classify each detected glucose value
-        classifications = []
-        for value_info in detected_values:
-            classification = classify_glucose(
-                test_type=value_info['test_type'],
-                value=value_info['value'],
-                unit=value_info['unit']
+            future = Future()
+            future.set_result((cached, 200))
+        else:
+            future = analysis_executor.submit(
+                run_analysis_job, filepath, upload['sha256'], cache_mode
             )
+            submitted = True
 
-            if classification.get('success'):
-                classifications.append({
-                    "detected": value_info,
-                    "classification": classification
-                })
-
-        # Step 5: Generate summary
-        if classifications:
-            # Check for concerning results
-            severity_levels = [c['classification'].get('severity', 'low') for c in classifications]
+        job_id = register_analysis_job(future)
 
-            if 'high' in severity_levels:
-                summary = "Analysis complete. Some values are in the diabetes range. Please consult a healthcare provider."
-            elif 'moderate' in severity_levels:
-                summary = "Analysis complete. Some values indicate prediabetes or need monitoring. Consider consulting a healthcare provider."
-            else:
-                summary = "Analysis complete. Values appear to be within normal range."
-        else:
-            summary = "Analysis complete. No classifiable glucose values found."
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "pending"
+        }), 202
 
-        # Cleanup temporary file
+    except Exception as e:
+        app.logger.error(f"Async analysis error: {e}")
         cleanup_file(filepath)
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "An error occurred during analysis. Please try again."
+        }), 500
+
+    finally:
+        # Cache hits and rejected uploads never reach the executor
+        if analysis_job_slots is not None and not submitted:
+            analysis_job_slots.release()
+
+
+@app.route('/api/analyze/result/<job_id>', methods=['GET'])
+def analyze_result(job_id):
+    """Get the result of a background analysis
+    ---
+    tags:
+      - Analysis
+    summary: Poll a background analysis
+    description: |
+      Returns 202 while the job is still running. Once finished, returns the
+      same body and status code /api/analyze would have returned.
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+        description: Job id returned by /api/analyze/async
+    responses:
+      200:
+        description: Analysis result
+      202:
+        description: Analysis still running
+      404:
+        description: Unknown or expired job id
+      429:
+        description: OCR queue was full when the job ran
+      500:
+        description: Analysis failed
+    """
+    with analysis_jobs_lock:
+        job = analysis_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
 
+    _, future = job
+
+    if not future.done():
         return jsonify({
             "success": True,
-            "is_valid_report": True,
-            "validation": validation_result,
-            "extracted_text": extracted_text,
-            "detected_values": detected_values,
-            "classifications": classifications,
-            "summary": summary,
-            "analysis_timestamp": datetime.now().isoformat()
-        })
+            "job_id": job_id,
+            "status": "pending"
+        }), 202
 
+    try:
+        result, status_code = future.result()
     except Exception as e:
         app.logger.error(f"Analysis error: {e}")
-        cleanup_file(filepath)
         return jsonify({
             "success": False,
             "error": str(e),
             "message": "An error occurred during analysis. Please try again."
         }), 500
 
+    # Cache hits carry the already-serialized body
+    if isinstance(result, bytes):
+        return Response(result, status=status_code, mimetype='application/json')
+
+    return jsonify(result), status_code
+
 
 # ============================================
 # Manual Input Endpoint
@@ -584,23 +1353,9 @@ def manual_input():
         description: Server error
     """
     try:
-        data = request.get_json()
-
-        if not data:
-            return jsonify({
-                "success": False,
-                "error": "No JSON data provided"
-            }), 400
-
-        # Validate required fields
-        required_fields = ['test_type', 'value']
-        missing_fields = [field for field in required_fields if field not in data]
-
-        if missing_fields:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required fields: {', '.join(missing_fields)}"
-            }), 400
+        data, error_response = parse_json_body(MANUAL_INPUT_FIELDS)
+        if error_response:
+            return error_response
 
         # Get values with defaults
         test_type = data['test_type']
@@ -650,7 +1405,9 @@ def manual_input_batch():
     tags:
       - Classification
     summary: Batch classify glucose values
-    description: Classifies multiple glucose readings in a single request.
+    description: |
+      Classifies multiple glucose readings in a single request. Results are
+      streamed in input order as they are classified; the summary follows them.
     consumes:
       - application/json
     parameters:
@@ -695,15 +1452,24 @@ def manual_input_batch():
               type: boolean
             input_count:
               type: integer
+            results:
+              type: array
+              items:
+                type: object
+            summary:
+              type: object
+            disclaimer:
+              type: string
+              description: Medical disclaimer, sent once instead of in every result
       400:
-        description: Missing or empty readings array
+        description: Missing or empty readings array, a reading that is not an object, or a non-string test_type or unit
       500:
         description: Server error
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
 
-        if not data or 'readings' not in data:
+        if not isinstance(data, dict) or 'readings' not in data:
             return jsonify({
                 "success": False,
                 "error": "No readings provided. Expected: {\"readings\": [...]}"
@@ -717,14 +1483,35 @@ def manual_input_batch():
                 "error": "Readings must be a non-empty array"
             }), 400
 
-        # Classify all readings
-        result = classify_multiple(readings)
+        # Checked up front: once streaming starts the status code can't change
+        if not all(isinstance(reading, dict) for reading in readings):
+            return jsonify({
+                "success": False,
+                "error": "Each reading must be an object"
+            }), 400
+        if not all(
+            isinstance(reading.get('test_type', ''), str)
+            and isinstance(reading.get('unit', 'mg/dL'), str)
+            for reading in readings
+        ):
+            return jsonify({
+                "success": False,
+                "error": "Each reading's test_type and unit must be strings"
+            }), 400
 
-        return jsonify({
-            "success": True,
-            "input_count": len(readings),
-            **result
-        })
+        def generate():
+            yield b'{"success":true,"input_count":%d,"results":[' % len(readings)
+            classifications = []
+            separator = b''
+            for result in classify_multiple_iter(readings):
+                if result.get('success'):
+                    classifications.append(result['classification'])
+                yield separator + orjson.dumps(result, option=ORJSONProvider.OPTIONS)
+                separator = b','
+            summary = summarize_classifications(classifications, len(readings))
+            yield b'],"summary":' + orjson.dumps(summary) + BATCH_DISCLAIMER_JSON
+
+        return Response(generate(), mimetype='application/json')
 
     except Exception as e:
         app.logger.error(f"Batch input error: {e}")
@@ -815,13 +1602,9 @@ def predict_risk():
         description: Server error
     """
     try:
-        data = request.get_json()
-
-        if not data:
-            return jsonify({
-                "success": False,
-                "error": "No JSON data provided"
-            }), 400
+        data, error_response = parse_json_body()
+        if error_response:
+            return error_response
 
         # Run prediction (validation handled by service)
         result = predict_diabetes_risk(data)
@@ -855,19 +1638,10 @@ def prediction_requirements():
           properties:
             success:
               type: boolean
-      500:
-        description: Server error
+      304:
+        description: Not modified (ETag matched If-None-Match)
     """
-    try:
-        return jsonify({
-            "success": True,
-            **get_input_requirements()
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    return static_json_response(PREDICTION_REQUIREMENTS_JSON)
 
 
 @app.route('/api/predict-risk/thresholds', methods=['GET'])
@@ -886,19 +1660,10 @@ def prediction_thresholds():
           properties:
             success:
               type: boolean
-      500:
-        description: Server error
+      304:
+        description: Not modified (ETag matched If-None-Match)
     """
-    try:
-        return jsonify({
-            "success": True,
-            **get_prediction_thresholds()
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    return static_json_response(PREDICTION_THRESHOLDS_JSON)
 
 
 @app.route('/api/predict-risk/feature-importance', methods=['GET'])
@@ -912,12 +1677,20 @@ def feature_importance():
     responses:
       200:
         description: Feature importance data
+      304:
+        description: Not modified (ETag matched If-None-Match)
       500:
         description: Server error
     """
+    global feature_importance_json
     try:
-        result = get_feature_importance()
-        return jsonify(result)
+        if feature_importance_json is None:
+            result = get_feature_importance()
+            if not result.get('success'):
+                return jsonify(result)
+            feature_importance_json = precompute_json(result)
+
+        return static_json_response(feature_importance_json)
     except Exception as e:
         return jsonify({
             "success": False,
@@ -998,13 +1771,9 @@ def predict_risk_with_explanation():
         description: Server error
     """
     try:
-        data = request.get_json()
-
-        if not data:
-            return jsonify({
-                "success": False,
-                "error": "No JSON data provided"
-            }), 400
+        data, error_response = parse_json_body()
+        if error_response:
+            return error_response
 
         result = predict_diabetes_risk_with_explanation(data)
 
@@ -1041,20 +1810,10 @@ def thresholds():
           properties:
             success:
               type: boolean
-      500:
-        description: Server error
+      304:
+        description: Not modified (ETag matched If-None-Match)
     """
-    try:
-        result = get_all_thresholds()
-        return jsonify({
-            "success": True,
-            **result
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    return static_json_response(THRESHOLDS_JSON)
 
 
 @app.route('/api/supported-tests', methods=['GET'])
@@ -1073,20 +1832,10 @@ def supported_tests():
           properties:
             success:
               type: boolean
-      500:
-        description: Server error
+      304:
+        description: Not modified (ETag matched If-None-Match)
     """
-    try:
-        result = get_supported_report_types()
-        return jsonify({
-            "success": True,
-            **result
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    return static_json_response(SUPPORTED_TESTS_JSON)
 
 
 # ============================================
@@ -1146,34 +1895,35 @@ def save_analysis():
               type: string
               format: date-time
       400:
-        description: Invalid analysis_type
+        description: Invalid analysis_type, or a field of the wrong type
       500:
         description: Server error
     """
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"success": False, "error": "No JSON data provided"}), 400
+        data, error_response = parse_json_body()
+        if error_response:
+            return error_response
 
         analysis_type = data.get('analysis_type')
-        if analysis_type not in ('ocr', 'manual', 'risk'):
+        if analysis_type not in ANALYSIS_TYPES:
             return jsonify({
                 "success": False,
                 "error": "analysis_type must be 'ocr', 'manual', or 'risk'"
             }), 400
 
+        fields = {}
+        for field, (types, type_name) in SAVE_ANALYSIS_FIELDS.items():
+            value = data.get(field)
+            # bool is an int subclass, but true/false is never a valid number here
+            if value is not None and (not isinstance(value, types) or isinstance(value, bool)):
+                return jsonify({
+                    "success": False,
+                    "error": f"{field} must be {type_name} or null"
+                }), 400
+            fields[field] = value
+
         db = get_database_service()
-        result = db.save_analysis(
-            analysis_type=analysis_type,
-            input_data=data.get('input_data'),
-            result_data=data.get('result_data'),
-            test_type=data.get('test_type'),
-            glucose_value=data.get('glucose_value'),
-            classification=data.get('classification'),
-            risk_category=data.get('risk_category'),
-            risk_percentage=data.get('risk_percentage'),
-            label=data.get('label'),
-        )
+        result = db.save_analysis(analysis_type=analysis_type, **fields)
 
         if not result.get('success'):
             return jsonify(result), 500
@@ -1192,18 +1942,29 @@ def get_history():
     tags:
       - History
     summary: Get analysis history with pagination
-    description: Returns a paginated list of saved analyses, optionally filtered by type.
+    description: |
+      Returns a paginated list of saved analyses, optionally filtered by type.
+      Pass the next_cursor of one page as cursor to fetch the next; unlike
+      offset, this stays fast however deep the page is.
+      Sent as MessagePack instead when the client accepts application/msgpack.
+    produces:
+      - application/json
+      - application/msgpack
     parameters:
       - name: limit
         in: query
         type: integer
         default: 50
         description: Maximum number of results
+      - name: cursor
+        in: query
+        type: string
+        description: next_cursor from the previous page
       - name: offset
         in: query
         type: integer
         default: 0
-        description: Number of results to skip
+        description: Number of results to skip (deprecated, ignored when cursor is given)
       - name: type
         in: query
         type: string
@@ -1227,6 +1988,13 @@ def get_history():
               type: integer
             offset:
               type: integer
+            next_cursor:
+              type: string
+              description: Cursor for the following page, null on the last page
+      304:
+        description: History unchanged since the ETag sent in If-None-Match
+      400:
+        description: Invalid cursor or type
       500:
         description: Server error
     """
@@ -1234,16 +2002,116 @@ def get_history():
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
         analysis_type = request.args.get('type', None)
+        if analysis_type and analysis_type not in ANALYSIS_TYPES:
+            return jsonify({
+                "success": False,
+                "error": "type must be 'ocr', 'manual', or 'risk'"
+            }), 400
+        cursor = request.args.get('cursor')
 
         db = get_database_service()
-        result = db.get_history(limit=limit, offset=offset, analysis_type=analysis_type)
-        return jsonify(result)
+
+        mimetype = negotiate_mimetype()
+
+        # Unchanged history since the client's last poll: skip the query and encoding
+        etag = f"history-{db.get_version()}"
+        if mimetype != 'application/json':
+            etag += '-msgpack'
+        cached_response = not_modified(etag)
+        if cached_response:
+            return cached_response
+
+        try:
+            result = db.get_history(
+                limit=limit, offset=offset, analysis_type=analysis_type, cursor=cursor
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        response = Response(encode_body(result, mimetype), mimetype=mimetype)
+        response.set_etag(etag)
+        response.vary.add('Accept')
+        return response
 
     except Exception as e:
         app.logger.error(f"Get history error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/history/stream', methods=['GET'])
+def stream_history():
+    """Stream analysis history
+    ---
+    tags:
+      - History
+    summary: Stream analysis history as a JSON array or NDJSON
+    description: Same rows as /api/history, written to the client as they are read from the database so memory stays flat for large limits. Returns a bare array without the pagination envelope, or one row per line when the client accepts application/x-ndjson.
+    produces:
+      - application/json
+      - application/x-ndjson
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        default: 50
+        description: Maximum number of results
+      - name: offset
+        in: query
+        type: integer
+        default: 0
+        description: Number of results to skip
+      - name: type
+        in: query
+        type: string
+        enum: [ocr, manual, risk]
+        description: Filter by analysis type
+    responses:
+      200:
+        description: JSON array of history rows, or newline-delimited rows
+        schema:
+          type: array
+          items:
+            type: object
+      400:
+        description: Invalid type
+      500:
+        description: Server error
+    """
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        analysis_type = request.args.get('type', None)
+        if analysis_type and analysis_type not in ANALYSIS_TYPES:
+            return jsonify({
+                "success": False,
+                "error": "type must be 'ocr', 'manual', or 'risk'"
+            }), 400
+
+        db = get_database_service()
+        rows = db.iter_history(limit=limit, offset=offset, analysis_type=analysis_type)
+
+        if request.accept_mimetypes.best_match(HISTORY_STREAM_MIMETYPES) == 'application/x-ndjson':
+            def generate_ndjson():
+                for row in rows:
+                    yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+
+            return Response(generate_ndjson(), mimetype='application/x-ndjson')
+
+        def generate():
+            yield b'['
+            separator = b''
+            for row in rows:
+                yield separator + orjson.dumps(row)
+                separator = b','
+            yield b']'
+
+        return Response(generate(), mimetype='application/json')
+
+    except Exception as e:
+        app.logger.error(f"Stream history error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route('/api/history/<analysis_id>', methods=['GET'])
 def get_analysis_detail(analysis_id):
     """Get a single analysis by ID
@@ -1257,23 +2125,44 @@ def get_analysis_detail(analysis_id):
         in: path
         type: string
         required: true
-        description: Analysis UUID
+        description: Analysis id (12 hex characters)
     responses:
       200:
         description: Analysis detail
+      304:
+        description: History unchanged since the ETag sent in If-None-Match
+      400:
+        description: Malformed analysis id
       404:
         description: Analysis not found
       500:
         description: Server error
     """
     try:
+        if not is_valid_analysis_id(analysis_id):
+            return jsonify({"success": False, "error": "Invalid analysis id"}), 400
+
         db = get_database_service()
-        result = db.get_analysis(analysis_id)
+
+        etag = f"history-{db.get_version()}"
+        cached_response = not_modified(etag)
+        if cached_response:
+            return cached_response
+
+        result = db.get_analysis(analysis_id, parse_json=False)
 
         if not result.get('success'):
             return jsonify(result), 404
 
-        return jsonify(result)
+        # Splice the stored JSON columns in verbatim rather than parsing and re-encoding them
+        analysis = result['analysis']
+        for field in ('input_data', 'result_data'):
+            if analysis.get(field):
+                analysis[field] = orjson.Fragment(analysis[field])
+
+        response = jsonify(result)
+        response.set_etag(etag)
+        return response
 
     except Exception as e:
         app.logger.error(f"Get analysis error: {e}")
@@ -1293,22 +2182,30 @@ def delete_analysis(analysis_id):
         in: path
         type: string
         required: true
-        description: Analysis UUID
+        description: Analysis id (12 hex characters)
     responses:
       200:
         description: Analysis deleted
+      400:
+        description: Malformed analysis id
       404:
         description: Analysis not found
       500:
         description: Server error
     """
     try:
+        if not is_valid_analysis_id(analysis_id):
+            return jsonify({"success": False, "error": "Invalid analysis id"}), 400
+
         db = get_database_service()
         result = db.delete_analysis(analysis_id)
 
         if not result.get('success'):
             return jsonify(result), 404
 
+        for pdf_path in glob.glob(os.path.join(Config.PDF_CACHE_DIR, f"{glob.escape(analysis_id)}-*.pdf")):
+            cleanup_file(pdf_path)
+
         return jsonify(result)
 
     except Exception as e:
@@ -1323,7 +2220,10 @@ def get_trends():
     tags:
       - History
     summary: Get trend data for charts
-    description: Returns glucose values over time for trend visualization, optionally filtered by test type and date range.
+    description: Returns glucose values over time for trend visualization, optionally filtered by test type and date range. Sent as MessagePack instead when the client accepts application/msgpack.
+    produces:
+      - application/json
+      - application/msgpack
     parameters:
       - name: days
         in: query
@@ -1335,6 +2235,11 @@ def get_trends():
         type: string
         enum: [fasting, hba1c, ppbs, rbs, ogtt]
         description: Filter by test type
+      - name: group_by
+        in: query
+        type: string
+        enum: [day]
+        description: Return one point per day and test type (average value, with min, max and readings) instead of every reading
     responses:
       200:
         description: Trend data points
@@ -1356,16 +2261,51 @@ def get_trends():
                     type: string
             count:
               type: integer
+      304:
+        description: Trend data unchanged since the ETag sent in If-None-Match
+      400:
+        description: Invalid group_by
       500:
         description: Server error
     """
     try:
         days = request.args.get('days', 30, type=int)
         test_type = request.args.get('test_type', None)
+        group_by = request.args.get('group_by', None)
+        if group_by and group_by != 'day':
+            return jsonify({
+                "success": False,
+                "error": "group_by must be 'day'"
+            }), 400
 
         db = get_database_service()
-        result = db.get_trend_data(test_type=test_type, days=days)
-        return jsonify(result)
+
+        mimetype = negotiate_mimetype()
+
+        # The day window slides with the clock, so the tag also rolls over every minute
+        etag = f"trends-{db.get_version()}-{int(time.time()) // 60}"
+        if mimetype != 'application/json':
+            etag += '-msgpack'
+        cached_response = not_modified(etag)
+        if cached_response:
+            return cached_response
+
+        cache_key = f"{etag}:{days}:{test_type}:{group_by}"
+        body = trends_cache.get(cache_key)
+        if body is None:
+            if group_by == 'day':
+                result = db.get_trend_data_daily(test_type=test_type, days=days)
+            else:
+                result = db.get_trend_data(test_type=test_type, days=days)
+            body = encode_body(result, mimetype)
+            trends_cache.set(cache_key, body)
+
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.vary.add('Accept')
+        response.cache_control.private = True
+        response.cache_control.max_age = TRENDS_MAX_AGE
+        return response
 
     except Exception as e:
         app.logger.error(f"Get trends error: {e}")
@@ -1383,7 +2323,10 @@ def download_pdf_report(analysis_id):
     tags:
       - Reports
     summary: Generate and download a PDF report
-    description: Generates a PDF report for a previously saved analysis and returns it as a download.
+    description: |
+      Generates a PDF report for a previously saved analysis and returns it as
+      a download. Saved analyses never change, so the rendered file is kept in
+      PDF_CACHE_DIR and served again on later requests.
     produces:
       - application/pdf
     parameters:
@@ -1391,34 +2334,56 @@ def download_pdf_report(analysis_id):
         in: path
         type: string
         required: true
-        description: Analysis UUID
+        description: Analysis id (12 hex characters)
     responses:
       200:
         description: PDF file
         schema:
           type: file
+      304:
+        description: Report unchanged since the ETag sent in If-None-Match
+      400:
+        description: Malformed analysis id
       404:
         description: Analysis not found
       500:
         description: PDF generation error
     """
     try:
+        if not is_valid_analysis_id(analysis_id):
+            return jsonify({"success": False, "error": "Invalid analysis id"}), 400
+
         db = get_database_service()
         result = db.get_analysis(analysis_id)
 
         if not result.get('success'):
             return jsonify(result), 404
 
-        pdf_service = get_pdf_service()
-        pdf_bytes = pdf_service.generate_report(result['analysis'])
+        analysis = result['analysis']
+        content_key = hashlib.blake2b(
+            orjson.dumps(analysis, option=ORJSONProvider.OPTIONS), digest_size=16
+        ).hexdigest()
+
+        cached_response = not_modified(content_key)
+        if cached_response:
+            return cached_response
 
-        return Response(
-            pdf_bytes,
+        pdf_path = os.path.join(Config.PDF_CACHE_DIR, f"{analysis_id}-{content_key}.pdf")
+        ensure_pdf_report(analysis, pdf_path)
+
+        # send_file streams from disk (sendfile under gunicorn)
+        response = send_file(
+            pdf_path,
             mimetype='application/pdf',
-            headers={
-                'Content-Disposition': f'attachment; filename=glucose-report-{analysis_id[:8]}.pdf'
-            }
+            as_attachment=True,
+            download_name=f'glucose-report-{analysis_id[:8]}.pdf',
+            etag=content_key,
+            max_age=PDF_MAX_AGE
         )
+        # send_file marks it public; reports are personal, so keep them out of shared caches
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
 
     except Exception as e:
         app.logger.error(f"PDF generation error: {e}")
@@ -1451,7 +2416,7 @@ def request_entity_too_large(error):
     return jsonify({
         "success": False,
         "error": "File too large",
-        "message": f"Maximum file size is {Config.MAX_CONTENT_LENGTH // (1024 * 1024)}MB"
+        "message": f"Maximum file size is {Config.MAX_CONTENT_LENGTH_MB}MB"
     }), 413
 
 
@@ -1469,16 +2434,13 @@ def internal_error(error):
 # ============================================
 
 if __name__ == '__main__':
-    # Create uploads folder if it doesn't exist
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
     # Log startup info
     print("=" * 50)
     print("Blood Glucose Analyzer API")
     print("=" * 50)
     print(f"Upload folder: {app.config['UPLOAD_FOLDER']}")
-    print(f"Max file size: {Config.MAX_CONTENT_LENGTH // (1024 * 1024)}MB")
-    print(f"Allowed extensions: {', '.join(Config.ALLOWED_EXTENSIONS)}")
+    print(f"Max file size: {Config.MAX_CONTENT_LENGTH_MB}MB")
+    print(f"Allowed extensions: {ALLOWED_EXTENSIONS_DISPLAY}")
     print("=" * 50)
 
     # Check services on startup
@@ -1489,5 +2451,5 @@ if __name__ == '__main__':
     print(f"ML Model: {'Ready' if ml_status.get('initialized') else 'Not initialized - ' + str(ml_status.get('error'))}")
     print("=" * 50)
 
-    # Run the app
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; use gunicorn (gunicorn.conf.py) in production
+    app.run(debug=Config.FLASK_ENV == 'development', host='0.0.0.0', port=5000)
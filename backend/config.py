@@ -1,12 +1,53 @@
 import os
 
 class Config:
-    UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
+    # Uploads are deleted after analysis, so a tmpfs mount works well here
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(os.path.dirname(__file__), 'uploads'))
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
+    MAX_CONTENT_LENGTH_MB = MAX_CONTENT_LENGTH // (1024 * 1024)
+    ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'bmp'})
+    # Rendered PDF reports, reused until their analysis is deleted or they are pruned
+    PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', os.path.join(UPLOAD_FOLDER, 'pdf_cache'))
+    # Reports kept in PDF_CACHE_DIR; the least recently served go first (0 = unlimited)
+    PDF_CACHE_MAX_FILES = int(os.environ.get('PDF_CACHE_MAX_FILES', 500))
+
+    # Number of /api/analyze results kept in the content-hash cache (0 disables)
+    ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 256))
+    # Seconds a cached analysis stays valid (0 = until evicted)
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 86400))
+
+    # OCR micro-batching: max already-queued images taken per batch
+    OCR_BATCH_SIZE = int(os.environ.get('OCR_BATCH_SIZE', 8))
+    # Images allowed to wait for OCR before new analyses get 429 (0 = unbounded)
+    OCR_MAX_PENDING = int(os.environ.get('OCR_MAX_PENDING', 200))
+
+    # Background /api/analyze/async jobs: worker threads and seconds results are kept
+    ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 4))
+    ANALYSIS_JOB_TTL = int(os.environ.get('ANALYSIS_JOB_TTL', 600))
+
+    # Seconds a /api/health report is reused before the checks run again (0 = always run)
+    HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', 5))
 
     # CORS — comma-separated origins, or "*" to allow all
     _cors_raw = os.environ.get('CORS_ORIGINS', '*')
-    CORS_ORIGINS = _cors_raw if _cors_raw == '*' else [o.strip() for o in _cors_raw.split(',')]
+    CORS_ORIGINS = _cors_raw if _cors_raw == '*' else tuple(
+        o.strip() for o in _cors_raw.split(',') if o.strip()
+    )
+    # Seconds browsers may cache a preflight response
+    CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 86400))
+
+    # Flask-Compress: brotli/gzip JSON bodies over 512 bytes; streamed responses
+    # (history stream, batch results) are left alone so they keep streaming
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_MIN_SIZE = 512
+    COMPRESS_LEVEL = 4
+    COMPRESS_BR_LEVEL = 4
+    COMPRESS_STREAMS = False
 
     FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
+
+    # Load OCR and the ML model at import time instead of on the first request
+    WARMUP = os.environ.get('WARMUP', 'true').lower() in ('1', 'true', 'yes')
+
+    # Serve Swagger UI at /api/docs/; disabling skips Flasgger's route scan at startup
+    ENABLE_SWAGGER = os.environ.get('ENABLE_SWAGGER', 'true').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration for the Blood Glucose Analyzer API.
+
+Threaded workers keep health, history and PDF routes responsive while a
+request is blocked on OCR.
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+worker_class = 'gthread'
+# /api/analyze/async keeps its jobs in the worker's memory, so a result poll
+# must reach the worker that accepted the upload. Keep a single worker unless
+# the async endpoint is unused; scale with threads instead.
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# No preload: each worker imports the app, and so warms up its own OCR engine
+# and ML model, after fork rather than inheriting them from the master
+preload_app = False
+
+# OCR on large images can take a while on CPU-only hosts
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
@@ -0,0 +1,73 @@
+"""
+Cache Service - Content-addressed cache for analysis results.
+
+Stores the final /api/analyze response body, already serialized to JSON,
+keyed by the SHA-256 of the uploaded image bytes, so re-uploading an
+identical report skips the OCR -> validation -> classification pipeline
+and the response encoding entirely.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+# Cache modes accepted by the analyze endpoint
+CACHE_MODES = ('on', 'read_only', 'off')
+
+
+class AnalysisCache:
+    """Thread-safe in-memory LRU cache with an optional TTL and max-age lookups."""
+
+    def __init__(self, maxsize: int = 256, ttl_s: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._entries: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, max_age_s: Optional[float] = None) -> Optional[bytes]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Content hash of the uploaded file
+            max_age_s: Ignore entries older than this many seconds (None = any age)
+
+        Returns:
+            The cached JSON response body, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if self.ttl_s is not None and age > self.ttl_s:
+                del self._entries[key]
+                return None
+            if max_age_s is not None and age > max_age_s:
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -7,7 +7,12 @@ Provides severity levels and recommendations for different test types.
 Reference: ADA Standards of Medical Care in Diabetes
 """
 
-from typing import Dict, Any, Optional, Tuple
+import math
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 
 # Conversion factor: mmol/L to mg/dL
@@ -24,7 +29,7 @@ THRESHOLDS = {
             {'max': 70, 'classification': 'Low', 'severity': 'moderate'},
             {'max': 99, 'classification': 'Normal', 'severity': 'low'},
             {'max': 125, 'classification': 'Prediabetes', 'severity': 'moderate'},
-            {'max': float('inf'), 'classification': 'Diabetes', 'severity': 'high'}
+            {'max': math.inf, 'classification': 'Diabetes', 'severity': 'high'}
         ],
         'normal_range': {'min': 70, 'max': 99},
         'display_name': 'Fasting Blood Sugar (FBS)'
@@ -35,7 +40,7 @@ THRESHOLDS = {
             {'max': 4.0, 'classification': 'Low', 'severity': 'moderate'},
             {'max': 5.6, 'classification': 'Normal', 'severity': 'low'},
             {'max': 6.4, 'classification': 'Prediabetes', 'severity': 'moderate'},
-            {'max': float('inf'), 'classification': 'Diabetes', 'severity': 'high'}
+            {'max': math.inf, 'classification': 'Diabetes', 'severity': 'high'}
         ],
         'normal_range': {'min': 4.0, 'max': 5.6},
         'display_name': 'HbA1c (Glycated Hemoglobin)'
@@ -46,7 +51,7 @@ THRESHOLDS = {
             {'max': 70, 'classification': 'Low', 'severity': 'moderate'},
             {'max': 139, 'classification': 'Normal', 'severity': 'low'},
             {'max': 199, 'classification': 'Prediabetes', 'severity': 'moderate'},
-            {'max': float('inf'), 'classification': 'Diabetes', 'severity': 'high'}
+            {'max': math.inf, 'classification': 'Diabetes', 'severity': 'high'}
         ],
         'normal_range': {'min': 70, 'max': 139},
         'display_name': 'Post-Prandial Blood Sugar (PPBS)'
@@ -57,7 +62,7 @@ THRESHOLDS = {
             {'max': 70, 'classification': 'Low', 'severity': 'moderate'},
             {'max': 139, 'classification': 'Normal', 'severity': 'low'},
             {'max': 199, 'classification': 'Needs Monitoring', 'severity': 'moderate'},
-            {'max': float('inf'), 'classification': 'Diabetes', 'severity': 'high'}
+            {'max': math.inf, 'classification': 'Diabetes', 'severity': 'high'}
         ],
         'normal_range': {'min': 70, 'max': 139},
         'display_name': 'Random Blood Sugar (RBS)'
@@ -68,7 +73,7 @@ THRESHOLDS = {
             {'max': 70, 'classification': 'Low', 'severity': 'moderate'},
             {'max': 139, 'classification': 'Normal', 'severity': 'low'},
             {'max': 199, 'classification': 'Prediabetes', 'severity': 'moderate'},
-            {'max': float('inf'), 'classification': 'Diabetes', 'severity': 'high'}
+            {'max': math.inf, 'classification': 'Diabetes', 'severity': 'high'}
         ],
         'normal_range': {'min': 70, 'max': 139},
         'display_name': 'Oral Glucose Tolerance Test (OGTT 2-hour)'
@@ -204,6 +209,17 @@ RECOMMENDATIONS = {
 }
 
 
+# Fallback when a test type has no advice for a classification
+DEFAULT_RECOMMENDATION = "Please consult with your healthcare provider to discuss your results."
+
+# RECOMMENDATIONS flattened so a lookup is a single hash of (test_type, classification)
+RECOMMENDATIONS_BY_KEY = {
+    (test_type, classification): recommendation
+    for test_type, recommendations in RECOMMENDATIONS.items()
+    for classification, recommendation in recommendations.items()
+}
+
+
 # Standard medical disclaimer
 DISCLAIMER = (
     "IMPORTANT: This analysis is for educational and informational purposes only. "
@@ -215,6 +231,29 @@ DISCLAIMER = (
 )
 
 
+# Unit spellings, lowercased, that mean mmol/L
+MMOL_UNITS = frozenset({'mmol/l', 'mmol'})
+
+
+def _glucose_to_mgdl(value: float, unit: str) -> Tuple[float, str]:
+    """Convert a plasma glucose value to mg/dL."""
+    if unit.lower() in MMOL_UNITS:
+        return value * MMOL_TO_MGDL, 'mg/dL'
+    return value, 'mg/dL'
+
+
+def _hba1c_as_percent(value: float, unit: str) -> Tuple[float, str]:
+    """HbA1c is always in percentage, no conversion needed."""
+    return value, '%'
+
+
+# Converter per test type, picked once instead of re-checking the type per reading
+UNIT_CONVERTERS = {
+    test_type: _hba1c_as_percent if test_type == 'hba1c' else _glucose_to_mgdl
+    for test_type in THRESHOLDS
+}
+
+
 def convert_to_mgdl(value: float, unit: str, test_type: str) -> Tuple[float, str]:
     """
     Convert glucose value to mg/dL if needed.
@@ -227,15 +266,22 @@ def convert_to_mgdl(value: float, unit: str, test_type: str) -> Tuple[float, str
     Returns:
         Tuple of (converted_value, unit)
     """
-    # HbA1c is always in percentage, no conversion needed
-    if test_type == 'hba1c':
-        return value, '%'
+    return UNIT_CONVERTERS.get(test_type, _glucose_to_mgdl)(value, unit)
 
-    # Convert mmol/L to mg/dL
-    if unit.lower() in ['mmol/l', 'mmol']:
-        return value * MMOL_TO_MGDL, 'mg/dL'
 
-    return value, 'mg/dL'
+# Values accepted by validate_input. Strings are rejected rather than coerced,
+# since the value is used as-is for conversion and in the response.
+NUMBER_TYPES = (int, float)
+
+# Largest believable value per test type, with the message for anything above it
+PLAUSIBLE_LIMITS = {
+    test_type: (
+        (20, "HbA1c value seems unusually high. Please verify the value.")
+        if test_type == 'hba1c' else
+        (1000, "Glucose value seems unusually high. Please verify the value.")
+    )
+    for test_type in THRESHOLDS
+}
 
 
 def validate_input(test_type: str, value: float) -> Tuple[bool, Optional[str]]:
@@ -255,23 +301,60 @@ def validate_input(test_type: str, value: float) -> Tuple[bool, Optional[str]]:
         return False, f"Invalid test type '{test_type}'. Valid types: {valid_types}"
 
     # Check value is a positive number
-    if not isinstance(value, (int, float)):
+    if not isinstance(value, NUMBER_TYPES):
         return False, "Value must be a number"
 
     if value < 0:
         return False, "Value must be a positive number"
 
     # Check for unreasonable values
-    if test_type == 'hba1c':
-        if value > 20:
-            return False, "HbA1c value seems unusually high. Please verify the value."
-    else:
-        if value > 1000:
-            return False, "Glucose value seems unusually high. Please verify the value."
+    max_value, too_high_message = PLAUSIBLE_LIMITS[test_type]
+    if value > max_value:
+        return False, too_high_message
 
     return True, None
 
 
+def _build_range_classifications(test_type: str) -> List[Dict[str, Any]]:
+    """Resolve each configured range of a test type into its classification result."""
+    results = []
+    prev_max = 0
+    for range_info in THRESHOLDS[test_type]['ranges']:
+        results.append({
+            'classification': range_info['classification'],
+            'severity': range_info['severity'],
+            'range': {
+                'min': prev_max + (1 if prev_max > 0 else 0),
+                'max': range_info['max'] if range_info['max'] != math.inf else None
+            }
+        })
+        prev_max = range_info['max']
+    return results
+
+
+# Lookup tables built once from THRESHOLDS: the upper bounds of every range
+# except the open-ended last one, so bisecting (or np.searchsorted) the bounds
+# gives the index of the first range whose max >= value. The results are
+# shared between calls and must not be modified.
+RANGE_CUTOFFS = {
+    test_type: tuple(r['max'] for r in config['ranges'][:-1])
+    for test_type, config in THRESHOLDS.items()
+}
+RANGE_BOUNDS = {
+    test_type: np.array(cutoffs, dtype=np.float64)
+    for test_type, cutoffs in RANGE_CUTOFFS.items()
+}
+RANGE_CLASSIFICATIONS = {
+    test_type: _build_range_classifications(test_type)
+    for test_type in THRESHOLDS
+}
+UNKNOWN_CLASSIFICATION = {
+    'classification': 'Unknown',
+    'severity': 'unknown',
+    'range': {'min': None, 'max': None}
+}
+
+
 def get_classification_for_value(test_type: str, value: float) -> Dict[str, Any]:
     """
     Get the classification details for a given value.
@@ -283,28 +366,12 @@ def get_classification_for_value(test_type: str, value: float) -> Dict[str, Any]
     Returns:
         Dictionary with classification, severity, and range
     """
-    threshold_config = THRESHOLDS[test_type]
-    ranges = threshold_config['ranges']
-
-    prev_max = 0
-    for range_info in ranges:
-        if value <= range_info['max']:
-            return {
-                'classification': range_info['classification'],
-                'severity': range_info['severity'],
-                'range': {
-                    'min': prev_max + (1 if prev_max > 0 else 0),
-                    'max': range_info['max'] if range_info['max'] != float('inf') else None
-                }
-            }
-        prev_max = range_info['max']
+    # NaN is above no range and below none either
+    if value != value:
+        return UNKNOWN_CLASSIFICATION
 
-    # Fallback (shouldn't reach here due to infinity max)
-    return {
-        'classification': 'Unknown',
-        'severity': 'unknown',
-        'range': {'min': None, 'max': None}
-    }
+    range_index = bisect_left(RANGE_CUTOFFS[test_type], value)
+    return RANGE_CLASSIFICATIONS[test_type][range_index]
 
 
 def get_recommendation(test_type: str, classification: str) -> str:
@@ -318,11 +385,7 @@ def get_recommendation(test_type: str, classification: str) -> str:
     Returns:
         Recommendation text
     """
-    test_recommendations = RECOMMENDATIONS.get(test_type, {})
-    return test_recommendations.get(
-        classification,
-        "Please consult with your healthcare provider to discuss your results."
-    )
+    return RECOMMENDATIONS_BY_KEY.get((test_type, classification), DEFAULT_RECOMMENDATION)
 
 
 def classify_glucose(test_type: str, value: float, unit: str = 'mg/dL') -> Dict[str, Any]:
@@ -352,6 +415,17 @@ def classify_glucose(test_type: str, value: float, unit: str = 'mg/dL') -> Dict[
     # Normalize test type
     test_type = test_type.lower().strip()
 
+    # Only hashable inputs can be cached; anything else takes the uncached path,
+    # which rejects a non-numeric value as before
+    if not isinstance(value, NUMBER_TYPES) or not isinstance(unit, str):
+        return _classify_normalized(test_type, value, unit)
+
+    # Copied so callers can't alter the cached result
+    return dict(_classify_glucose_cached(test_type, value, unit))
+
+
+def _classify_normalized(test_type: str, value: float, unit: str) -> Dict[str, Any]:
+    """Classify a value for an already normalized test type; see classify_glucose()."""
     # Validate input
     is_valid, error_message = validate_input(test_type, value)
     if not is_valid:
@@ -370,13 +444,36 @@ def classify_glucose(test_type: str, value: float, unit: str = 'mg/dL') -> Dict[
     # Get classification
     classification_result = get_classification_for_value(test_type, converted_value)
 
+    return _build_classification(
+        test_type, original_value, original_unit,
+        converted_value, converted_unit, classification_result
+    )
+
+
+# Distinct (test_type, value, unit) results kept by classify_glucose
+CLASSIFY_CACHE_SIZE = 4096
+
+# typed so 100 and 100.0 keep their own original_value
+_classify_glucose_cached = lru_cache(maxsize=CLASSIFY_CACHE_SIZE, typed=True)(_classify_normalized)
+
+
+def _build_classification(
+    test_type: str,
+    original_value: float,
+    original_unit: str,
+    converted_value: float,
+    converted_unit: str,
+    classification_result: Dict[str, Any],
+    include_disclaimer: bool = True,
+) -> Dict[str, Any]:
+    """Assemble the classify_glucose() response for an already classified value."""
     # Get recommendation
     recommendation = get_recommendation(test_type, classification_result['classification'])
 
     # Get threshold config
     threshold_config = THRESHOLDS[test_type]
 
-    return {
+    result = {
         'success': True,
         'test_type': test_type,
         'display_name': threshold_config['display_name'],
@@ -389,38 +486,101 @@ def classify_glucose(test_type: str, value: float, unit: str = 'mg/dL') -> Dict[
         'range': classification_result['range'],
         'normal_range': threshold_config['normal_range'],
         'recommendation': recommendation,
-        'disclaimer': DISCLAIMER
     }
+    if include_disclaimer:
+        result['disclaimer'] = DISCLAIMER
+    return result
 
 
-def classify_multiple(readings: list) -> Dict[str, Any]:
+# Readings classified per vectorized pass when streaming a batch
+CLASSIFY_CHUNK_SIZE = 512
+
+
+def _classify_chunk(readings: list) -> List[Dict[str, Any]]:
     """
-    Classify multiple glucose readings.
+    Classify a list of readings, preserving input order.
+
+    Readings are validated and converted one by one, then bucketed per test
+    type with a single np.searchsorted call against that type's thresholds.
+    Each result is what classify_glucose() returns, minus the disclaimer:
+    batch callers send DISCLAIMER once for the whole batch instead.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(readings)
+    pending: Dict[str, List[Tuple[int, float, str, float, str]]] = {}
+
+    for i, reading in enumerate(readings):
+        test_type = reading.get('test_type', '').lower().strip()
+        value = reading.get('value', 0)
+        unit = reading.get('unit', 'mg/dL')
+
+        is_valid, error_message = validate_input(test_type, value)
+        if not is_valid:
+            results[i] = {
+                'success': False,
+                'error': error_message
+            }
+            continue
+
+        converted_value, converted_unit = convert_to_mgdl(value, unit, test_type)
+        pending.setdefault(test_type, []).append(
+            (i, value, unit, converted_value, converted_unit)
+        )
+
+    for test_type, group in pending.items():
+        values = np.fromiter((entry[3] for entry in group), dtype=np.float64, count=len(group))
+        range_indexes = np.searchsorted(RANGE_BOUNDS[test_type], values)
+        # NaN falls through every range in the scalar path, so keep it 'Unknown'
+        range_indexes[np.isnan(values)] = -1
+        ranges = RANGE_CLASSIFICATIONS[test_type]
+
+        for (i, value, unit, converted_value, converted_unit), range_index in zip(
+            group, range_indexes.tolist()
+        ):
+            classification_result = ranges[range_index] if range_index >= 0 else UNKNOWN_CLASSIFICATION
+            results[i] = _build_classification(
+                test_type, value, unit, converted_value, converted_unit, classification_result,
+                include_disclaimer=False
+            )
+
+    return results
+
+
+def classify_multiple_iter(readings: list) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the classification of each reading, in input order.
+
+    Works through CLASSIFY_CHUNK_SIZE readings at a time so a caller can
+    start sending results before the whole batch is classified.
 
     Args:
         readings: List of dictionaries with 'test_type', 'value', and 'unit' keys
 
+    Yields:
+        One classify_glucose()-style result per reading, without the disclaimer
+    """
+    for start in range(0, len(readings), CLASSIFY_CHUNK_SIZE):
+        yield from _classify_chunk(readings[start:start + CLASSIFY_CHUNK_SIZE])
+
+
+def summarize_classifications(classifications: Iterable[str], total_readings: int) -> Dict[str, Any]:
+    """
+    Build the overall status for a batch of readings.
+
+    Args:
+        classifications: Classification labels of the successfully classified readings
+        total_readings: Number of readings in the batch, including invalid ones
+
     Returns:
-        Dictionary with results for each reading and summary
+        Summary dictionary with total_readings, overall_status and overall_severity
     """
-    results = []
     has_diabetes = False
     has_prediabetes = False
 
-    for reading in readings:
-        test_type = reading.get('test_type', '')
-        value = reading.get('value', 0)
-        unit = reading.get('unit', 'mg/dL')
-
-        result = classify_glucose(test_type, value, unit)
-        results.append(result)
-
-        if result.get('success'):
-            classification = result.get('classification', '')
-            if classification == 'Diabetes':
-                has_diabetes = True
-            elif classification in ['Prediabetes', 'Needs Monitoring']:
-                has_prediabetes = True
+    for classification in classifications:
+        if classification == 'Diabetes':
+            has_diabetes = True
+        elif classification in ['Prediabetes', 'Needs Monitoring']:
+            has_prediabetes = True
 
     # Determine overall status
     if has_diabetes:
@@ -433,21 +593,42 @@ def classify_multiple(readings: list) -> Dict[str, Any]:
         overall_status = 'Normal Range'
         overall_severity = 'low'
 
+    return {
+        'total_readings': total_readings,
+        'overall_status': overall_status,
+        'overall_severity': overall_severity
+    }
+
+
+def classify_multiple(readings: list) -> Dict[str, Any]:
+    """
+    Classify multiple glucose readings.
+
+    Args:
+        readings: List of dictionaries with 'test_type', 'value', and 'unit' keys
+
+    Returns:
+        Dictionary with results for each reading and summary
+    """
+    results = _classify_chunk(readings)
+
     return {
         'results': results,
-        'summary': {
-            'total_readings': len(readings),
-            'overall_status': overall_status,
-            'overall_severity': overall_severity
-        },
+        'summary': summarize_classifications(
+            (result.get('classification', '') for result in results if result.get('success')),
+            len(readings)
+        ),
         'disclaimer': DISCLAIMER
     }
 
 
+@lru_cache(maxsize=1)
 def get_all_thresholds() -> Dict[str, Any]:
     """
     Get all threshold values for frontend display.
 
+    Computed once per process; the returned dict is shared, so don't mutate it.
+
     Returns:
         Dictionary containing all test types with their thresholds and ranges
     """
@@ -459,7 +640,7 @@ def get_all_thresholds() -> Dict[str, Any]:
 
         for range_info in config['ranges']:
             max_val = range_info['max']
-            if max_val == float('inf'):
+            if max_val == math.inf:
                 range_str = f">= {prev_max + 1}"
                 max_display = None
             else:
@@ -476,7 +657,7 @@ def get_all_thresholds() -> Dict[str, Any]:
                 'max': max_display,
                 'range_display': range_str
             })
-            prev_max = max_val if max_val != float('inf') else prev_max
+            prev_max = max_val if max_val != math.inf else prev_max
 
         thresholds_data[test_type] = {
             'display_name': config['display_name'],
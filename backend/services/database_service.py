@@ -6,11 +6,16 @@ for history browsing and trend visualization.
 """
 
 import os
+import re
 import json
-import uuid
+import secrets
+import base64
 import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import orjson
 
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +23,87 @@ BACKEND_DIR = os.path.dirname(CURRENT_DIR)
 DATA_DIR = os.path.join(BACKEND_DIR, 'data')
 DB_PATH = os.path.join(DATA_DIR, 'analyzer.db')
 
+# Applied once to each thread's connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA cache_size=-65536",      # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MiB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",      # sorts and temp b-trees stay off disk
+)
+
+# Prepared statements kept per connection by sqlite3
+STATEMENT_CACHE_SIZE = 64
+
+# Rows pulled from SQLite per fetch when streaming history
+HISTORY_FETCH_SIZE = 256
+
+# Stored input/result JSON: numpy values from the ML services and non-string
+# keys are accepted, and NaN is written as null so the text is always valid JSON
+STORED_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dump_stored_json(data: Any) -> Optional[str]:
+    """Serialize an input/result payload for its TEXT column, or None when empty."""
+    return orjson.dumps(data, option=STORED_JSON_OPTIONS).decode() if data else None
+
+
+def load_stored_json(text: str) -> Any:
+    """Parse an input/result column written by dump_stored_json() or by older versions."""
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # Rows saved with json.dumps may hold NaN/Infinity, which orjson rejects
+        return json.loads(text)
+
+
+# PRAGMA user_version from which every stored input/result column is strict JSON
+STORED_JSON_SCHEMA_VERSION = 1
+
+
+# Columns of a history row, in SELECT order
+HISTORY_COLUMNS = (
+    'id', 'analysis_type', 'created_at', 'test_type',
+    'glucose_value', 'classification', 'risk_category',
+    'risk_percentage', 'label',
+)
+HISTORY_SELECT = "SELECT " + ", ".join(HISTORY_COLUMNS) + " FROM analyses"
+
+# Analysis ids are 12 random hex digits (48 bits)
+ANALYSIS_ID_LENGTH = 12
+ANALYSIS_ID_RE = re.compile(r'[0-9a-f]{%d}' % ANALYSIS_ID_LENGTH)
+
+
+def is_valid_analysis_id(analysis_id: str) -> bool:
+    """Check that an id has the shape save_analysis() issues, without touching the database."""
+    return ANALYSIS_ID_RE.fullmatch(analysis_id) is not None
+
+
+def encode_cursor(created_at: str, analysis_id: str) -> str:
+    """Encode the (created_at, id) of the last row on a page as an opaque cursor."""
+    raw = json.dumps([created_at, analysis_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, analysis_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if not isinstance(created_at, str) or not isinstance(analysis_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return created_at, analysis_id
+
 
 class DatabaseService:
     """SQLite-backed storage for analysis history."""
@@ -25,42 +111,141 @@ class DatabaseService:
     def __init__(self):
         os.makedirs(DATA_DIR, exist_ok=True)
         self.db_path = DB_PATH
+        self._local = threading.local()
+        # Every thread's connection, so close_all() can reach them from one thread
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        # History totals per analysis type, tagged with the history version they were counted at
+        self._count_cache: Dict[Optional[str], Tuple[int, int]] = {}
+        self._count_cache_lock = threading.Lock()
         self._init_db()
 
     def _get_connection(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA foreign_keys=ON")
+        """Return this thread's connection, opening and configuring it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            conn.row_factory = sqlite3.Row
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                # Close what finished request threads left behind
+                for thread in [t for t in self._connections if not t.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = conn
         return conn
 
+    def close_all(self):
+        """Close every thread's connection; threads that query again get a new one."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+            self._local = threading.local()
+        for conn in connections.values():
+            conn.close()
+
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        """A cursor on this thread's connection that returns plain tuples, for hot row loops."""
+        cursor = self._get_connection().cursor()
+        cursor.row_factory = None
+        return cursor
+
     def _init_db(self):
         """Create tables if they don't exist."""
         conn = self._get_connection()
-        try:
-            conn.executescript("""
-                CREATE TABLE IF NOT EXISTS analyses (
-                    id TEXT PRIMARY KEY,
-                    analysis_type TEXT NOT NULL,
-                    created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                    input_data TEXT,
-                    result_data TEXT,
-                    test_type TEXT,
-                    glucose_value REAL,
-                    classification TEXT,
-                    risk_category TEXT,
-                    risk_percentage REAL,
-                    label TEXT
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_analyses_created_at
-                    ON analyses(created_at DESC);
-                CREATE INDEX IF NOT EXISTS idx_analyses_type
-                    ON analyses(analysis_type);
-            """)
-            conn.commit()
-        finally:
-            conn.close()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id TEXT PRIMARY KEY,
+                analysis_type TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (datetime('now')),
+                input_data TEXT,
+                result_data TEXT,
+                test_type TEXT,
+                glucose_value REAL,
+                classification TEXT,
+                risk_category TEXT,
+                risk_percentage REAL,
+                label TEXT
+            );
+
+            -- Keyset pages in (created_at, id) order; its prefix also serves
+            -- created_at-only scans, so the old single-column index is dropped
+            DROP INDEX IF EXISTS idx_analyses_created_at;
+            CREATE INDEX IF NOT EXISTS idx_analyses_created_at_id
+                ON analyses(created_at DESC, id DESC);
+            -- History filtered by type, in page order, without a sort step;
+            -- supersedes the old single-column type index
+            DROP INDEX IF EXISTS idx_analyses_type;
+            CREATE INDEX IF NOT EXISTS idx_analyses_type_created_at_id
+                ON analyses(analysis_type, created_at DESC, id DESC);
+            -- Covers the trend query so it never reads the table rows; partial
+            -- because trends skip rows without a glucose value (risk analyses)
+            DROP INDEX IF EXISTS idx_analyses_test_type_created_at;
+            CREATE INDEX IF NOT EXISTS idx_analyses_trend
+                ON analyses(test_type, created_at, glucose_value, classification)
+                WHERE glucose_value IS NOT NULL;
+
+            -- Bumped on every insert/delete so readers can tell when history changed
+            CREATE TABLE IF NOT EXISTS history_version (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                version INTEGER NOT NULL
+            );
+            -- Random start so a recreated database never reissues an old version
+            INSERT OR IGNORE INTO history_version (id, version)
+                VALUES (0, abs(random() % 1000000000000));
+
+            CREATE TRIGGER IF NOT EXISTS analyses_version_insert
+                AFTER INSERT ON analyses
+            BEGIN
+                UPDATE history_version SET version = version + 1 WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS analyses_version_delete
+                AFTER DELETE ON analyses
+            BEGIN
+                UPDATE history_version SET version = version + 1 WHERE id = 0;
+            END;
+        """)
+        conn.commit()
+        self._migrate_stored_json(conn)
+
+    def _migrate_stored_json(self, conn: sqlite3.Connection):
+        """
+        Rewrite input/result JSON saved by older versions as strict JSON, once per database.
+
+        json.dumps wrote NaN/Infinity, which get_analysis(parse_json=False)
+        callers would otherwise pass through verbatim as invalid JSON.
+        """
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= STORED_JSON_SCHEMA_VERSION:
+                return
+
+            rows = conn.execute(
+                """
+                SELECT id, input_data, result_data FROM analyses
+                WHERE input_data LIKE '%NaN%' OR input_data LIKE '%Infinity%'
+                   OR result_data LIKE '%NaN%' OR result_data LIKE '%Infinity%'
+                """
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE analyses SET input_data = ?, result_data = ? WHERE id = ?",
+                    (
+                        dump_stored_json(load_stored_json(row['input_data']))
+                        if row['input_data'] else None,
+                        dump_stored_json(load_stored_json(row['result_data']))
+                        if row['result_data'] else None,
+                        row['id'],
+                    ),
+                )
+            if rows:
+                # Detail responses for these rows change, so stale ETags must not match
+                conn.execute("UPDATE history_version SET version = version + 1 WHERE id = 0")
+            conn.execute(f"PRAGMA user_version = {STORED_JSON_SCHEMA_VERSION}")
 
     def save_analysis(
         self,
@@ -75,122 +260,223 @@ class DatabaseService:
         label: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Save an analysis result. Returns the saved record's id."""
-        analysis_id = uuid.uuid4().hex[:12]
+        result = self.save_analyses_bulk([{
+            'analysis_type': analysis_type,
+            'input_data': input_data,
+            'result_data': result_data,
+            'test_type': test_type,
+            'glucose_value': glucose_value,
+            'classification': classification,
+            'risk_category': risk_category,
+            'risk_percentage': risk_percentage,
+            'label': label,
+        }])
+        if not result['success']:
+            return result
+        return {'success': True, 'id': result['ids'][0], 'created_at': result['created_at']}
+
+    def save_analyses_bulk(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Save many analysis results in one transaction.
+
+        Each record takes the same keys as the save_analysis() arguments;
+        analysis_type is required. Either every record is saved or none is.
+
+        Returns:
+            Dictionary with the new ids, in record order, and their shared created_at
+        """
         now = datetime.now().isoformat()
 
+        # Built before taking the write lock so it is held only for the inserts
+        ids = []
+        rows = []
+        for record in records:
+            analysis_id = secrets.token_hex(ANALYSIS_ID_LENGTH // 2)
+            ids.append(analysis_id)
+            rows.append((
+                analysis_id,
+                record['analysis_type'],
+                now,
+                dump_stored_json(record.get('input_data')),
+                dump_stored_json(record.get('result_data')),
+                record.get('test_type'),
+                record.get('glucose_value'),
+                record.get('classification'),
+                record.get('risk_category'),
+                record.get('risk_percentage'),
+                record.get('label'),
+            ))
+
         conn = self._get_connection()
         try:
-            conn.execute(
-                """
-                INSERT INTO analyses
-                    (id, analysis_type, created_at, input_data, result_data,
-                     test_type, glucose_value, classification,
-                     risk_category, risk_percentage, label)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    analysis_id,
-                    analysis_type,
-                    now,
-                    json.dumps(input_data) if input_data else None,
-                    json.dumps(result_data) if result_data else None,
-                    test_type,
-                    glucose_value,
-                    classification,
-                    risk_category,
-                    risk_percentage,
-                    label,
-                ),
-            )
-            conn.commit()
-            return {'success': True, 'id': analysis_id, 'created_at': now}
+            # Commits on success, rolls back on error so the shared connection stays clean
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    """
+                    INSERT INTO analyses
+                        (id, analysis_type, created_at, input_data, result_data,
+                         test_type, glucose_value, classification,
+                         risk_category, risk_percentage, label)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+            return {'success': True, 'ids': ids, 'created_at': now}
         except Exception as e:
             return {'success': False, 'error': str(e)}
-        finally:
-            conn.close()
+
+    def get_version(self) -> int:
+        """Get the history version, which changes whenever an analysis is saved or deleted."""
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT version FROM history_version WHERE id = 0"
+        ).fetchone()
+        return row['version']
 
     def get_history(
         self,
         limit: int = 50,
         offset: int = 0,
         analysis_type: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Get analysis history with pagination."""
+        """
+        Get analysis history with pagination.
+
+        With a cursor (the next_cursor of the previous page), the page starts
+        right after that row via an index seek, however deep it is; offset is
+        then ignored. Without one, offset pagination is used as before.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
         conn = self._get_connection()
-        try:
-            # Build query
-            where = ""
-            params: List[Any] = []
-            if analysis_type:
-                where = "WHERE analysis_type = ?"
-                params.append(analysis_type)
-
-            # Get total count
+
+        # Build query
+        where = ""
+        params: List[Any] = []
+        if analysis_type:
+            where = "WHERE analysis_type = ?"
+            params.append(analysis_type)
+
+        # Get total count, reusing the last one until history changes. The
+        # version comes from the database, so writes by other workers count too.
+        version = self.get_version()
+        with self._count_cache_lock:
+            cached = self._count_cache.get(analysis_type)
+        if cached is not None and cached[0] == version:
+            total = cached[1]
+        else:
             count_row = conn.execute(
                 f"SELECT COUNT(*) as total FROM analyses {where}", params
             ).fetchone()
             total = count_row['total']
-
-            # Get paginated results
-            rows = conn.execute(
-                f"""
-                SELECT id, analysis_type, created_at, test_type,
-                       glucose_value, classification, risk_category,
-                       risk_percentage, label
-                FROM analyses {where}
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-                """,
-                params + [limit, offset],
-            ).fetchall()
-
-            analyses = [dict(row) for row in rows]
-
-            return {
-                'success': True,
-                'analyses': analyses,
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-            }
+            with self._count_cache_lock:
+                self._count_cache[analysis_type] = (version, total)
+
+        page_where = where
+        page_params = list(params)
+        if cursor:
+            page_where += (" AND " if where else "WHERE ") + "(created_at, id) < (?, ?)"
+            page_params.extend(decode_cursor(cursor))
+            offset = 0
+
+        # Get paginated results
+        rows = self._tuple_cursor().execute(
+            f"""
+            {HISTORY_SELECT} {page_where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+            """,
+            page_params + [limit, offset],
+        ).fetchall()
+
+        analyses = [dict(zip(HISTORY_COLUMNS, row)) for row in rows]
+
+        next_cursor = None
+        if analyses and len(analyses) == limit:
+            last = analyses[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+
+        return {
+            'success': True,
+            'analyses': analyses,
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'next_cursor': next_cursor,
+        }
+
+    def iter_history(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        analysis_type: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield history rows one at a time, fetching from SQLite in batches."""
+        where = ""
+        params: List[Any] = []
+        if analysis_type:
+            where = "WHERE analysis_type = ?"
+            params.append(analysis_type)
+
+        cursor = self._tuple_cursor().execute(
+            f"""
+            {HISTORY_SELECT} {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+            """,
+            params + [limit, offset],
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(HISTORY_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(HISTORY_COLUMNS, row))
         finally:
-            conn.close()
+            cursor.close()
 
-    def get_analysis(self, analysis_id: str) -> Dict[str, Any]:
-        """Get a single analysis by ID, including full result data."""
-        conn = self._get_connection()
-        try:
-            row = conn.execute(
-                "SELECT * FROM analyses WHERE id = ?", (analysis_id,)
-            ).fetchone()
+    def get_analysis(self, analysis_id: str, parse_json: bool = True) -> Dict[str, Any]:
+        """
+        Get a single analysis by ID, including full result data.
 
-            if not row:
-                return {'success': False, 'error': 'Analysis not found'}
+        With parse_json=False, input_data and result_data are returned as the
+        JSON text stored in the row, for callers that only re-serialize them.
+        """
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT * FROM analyses WHERE id = ?", (analysis_id,)
+        ).fetchone()
 
-            record = dict(row)
-            # Parse JSON fields
-            if record.get('input_data'):
-                record['input_data'] = json.loads(record['input_data'])
-            if record.get('result_data'):
-                record['result_data'] = json.loads(record['result_data'])
+        if not row:
+            return {'success': False, 'error': 'Analysis not found'}
 
+        record = dict(row)
+        if not parse_json:
             return {'success': True, 'analysis': record}
-        finally:
-            conn.close()
+
+        # Parse JSON fields
+        if record.get('input_data'):
+            record['input_data'] = load_stored_json(record['input_data'])
+        if record.get('result_data'):
+            record['result_data'] = load_stored_json(record['result_data'])
+
+        return {'success': True, 'analysis': record}
 
     def delete_analysis(self, analysis_id: str) -> Dict[str, Any]:
         """Delete a single analysis."""
         conn = self._get_connection()
-        try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
             cursor = conn.execute(
                 "DELETE FROM analyses WHERE id = ?", (analysis_id,)
             )
-            conn.commit()
-            if cursor.rowcount == 0:
-                return {'success': False, 'error': 'Analysis not found'}
-            return {'success': True}
-        finally:
-            conn.close()
+        if cursor.rowcount == 0:
+            return {'success': False, 'error': 'Analysis not found'}
+        return {'success': True}
 
     def get_trend_data(
         self,
@@ -198,52 +484,107 @@ class DatabaseService:
         days: int = 30,
     ) -> Dict[str, Any]:
         """Get glucose values over time for trend charts."""
-        conn = self._get_connection()
-        try:
-            where_clauses = ["glucose_value IS NOT NULL"]
-            params: List[Any] = []
-
-            if test_type:
-                where_clauses.append("test_type = ?")
-                params.append(test_type)
-
-            if days > 0:
-                where_clauses.append(
-                    "created_at >= datetime('now', ?)"
-                )
-                params.append(f'-{days} days')
-
-            where = "WHERE " + " AND ".join(where_clauses)
-
-            rows = conn.execute(
-                f"""
-                SELECT created_at as date, glucose_value as value,
-                       test_type, classification
-                FROM analyses
-                {where}
-                ORDER BY created_at ASC
-                """,
-                params,
-            ).fetchall()
-
-            data_points = [dict(row) for row in rows]
-
-            return {
-                'success': True,
-                'data_points': data_points,
-                'count': len(data_points),
+        where, params = self._trend_filter(test_type, days)
+
+        rows = self._tuple_cursor().execute(
+            f"""
+            SELECT created_at, glucose_value, test_type, classification
+            FROM analyses
+            {where}
+            ORDER BY created_at ASC
+            """,
+            params,
+        ).fetchall()
+
+        data_points = [
+            {'date': date, 'value': value, 'test_type': test_type, 'classification': classification}
+            for date, value, test_type, classification in rows
+        ]
+
+        return {
+            'success': True,
+            'data_points': data_points,
+            'count': len(data_points),
+        }
+
+    def get_trend_data_daily(
+        self,
+        test_type: Optional[str] = None,
+        days: int = 30,
+    ) -> Dict[str, Any]:
+        """
+        Get daily glucose averages for trend charts, aggregated in SQLite.
+
+        Readings are grouped per calendar day and test type, since HbA1c (%)
+        and glucose (mg/dL) values can't share an average.
+        """
+        where, params = self._trend_filter(test_type, days)
+
+        rows = self._tuple_cursor().execute(
+            f"""
+            SELECT date(created_at) AS day, test_type, AVG(glucose_value),
+                   MIN(glucose_value), MAX(glucose_value), COUNT(*)
+            FROM analyses
+            {where}
+            GROUP BY day, test_type
+            ORDER BY day ASC, test_type ASC
+            """,
+            params,
+        ).fetchall()
+
+        data_points = [
+            {
+                'date': day,
+                'test_type': row_test_type,
+                'value': round(average, 1),
+                'min': minimum,
+                'max': maximum,
+                'readings': readings,
             }
-        finally:
-            conn.close()
+            for day, row_test_type, average, minimum, maximum, readings in rows
+        ]
+
+        return {
+            'success': True,
+            'data_points': data_points,
+            'count': len(data_points),
+        }
+
+    @staticmethod
+    def _trend_filter(test_type: Optional[str], days: int) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause and parameters shared by the trend queries."""
+        where_clauses = ["glucose_value IS NOT NULL"]
+        params: List[Any] = []
+
+        if test_type:
+            where_clauses.append("test_type = ?")
+            params.append(test_type)
+
+        if days > 0:
+            where_clauses.append(
+                "created_at >= datetime('now', ?)"
+            )
+            params.append(f'-{days} days')
+
+        return "WHERE " + " AND ".join(where_clauses), params
 
 
 # Singleton
 _db_instance: Optional[DatabaseService] = None
+_db_instance_lock = threading.Lock()
 
 
 def get_database_service() -> DatabaseService:
     """Get or create the database service singleton."""
     global _db_instance
     if _db_instance is None:
-        _db_instance = DatabaseService()
+        with _db_instance_lock:
+            if _db_instance is None:
+                _db_instance = DatabaseService()
     return _db_instance
+
+
+def close_database_service():
+    """Close the singleton's connections at shutdown, if it was ever created."""
+    if _db_instance is not None:
+        _db_instance.close_all()
@@ -5,8 +5,9 @@ Provides per-prediction feature explanations using SHAP TreeExplainer
 and prediction confidence intervals using Random Forest tree variance.
 """
 
+import threading
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 
 # Feature display names and units for patient-friendly explanations
@@ -32,6 +33,7 @@ INPUT_TO_FEATURE = {
     'diabetes_pedigree': 'DiabetesPedigreeFunction',
     'age': 'Age',
 }
+FEATURE_TO_INPUT = {feature: field for field, feature in INPUT_TO_FEATURE.items()}
 
 
 class ExplainabilityService:
@@ -41,6 +43,10 @@ class ExplainabilityService:
         self.explainer = None
         self.initialized = False
         self.init_error = None
+        # (model, [(tree structure, class 1 probability per node), ...]) for the
+        # loaded forest, replaced as one tuple so readers never mix two models
+        self._forest_trees: Optional[Tuple[Any, List[Any]]] = None
+        self._forest_trees_lock = threading.Lock()
 
     def _ensure_initialized(self) -> bool:
         """Lazy-initialize the SHAP explainer on first use."""
@@ -48,7 +54,6 @@ class ExplainabilityService:
             return True
 
         try:
-            import shap
             from services.ml_predictor import get_predictor
 
             predictor = get_predictor()
@@ -56,7 +61,7 @@ class ExplainabilityService:
                 self.init_error = "ML model not initialized"
                 return False
 
-            self.explainer = shap.TreeExplainer(predictor.model)
+            self.explainer = self._create_tree_explainer(predictor.model)
             self.initialized = True
             return True
 
@@ -64,6 +69,23 @@ class ExplainabilityService:
             self.init_error = f"Failed to initialize SHAP explainer: {str(e)}"
             return False
 
+    @staticmethod
+    def _create_tree_explainer(model):
+        """
+        Build a TreeExplainer for the forest, preferring FastTreeSHAP when installed.
+
+        FastTreeSHAP's v2 algorithm precomputes per-tree tables once so each
+        explanation is faster, with the same shap_values() output as shap.
+        """
+        try:
+            from fasttreeshap import TreeExplainer
+        except ImportError:
+            from shap import TreeExplainer
+            return TreeExplainer(model)
+
+        # One thread: requests are already served concurrently
+        return TreeExplainer(model, algorithm='v2', n_jobs=1)
+
     def explain_prediction(
         self,
         scaled_features: np.ndarray,
@@ -79,25 +101,29 @@ class ExplainabilityService:
         Returns:
             Dict with feature contributions, top factors, and plain English summary
         """
+        return self.explain_predictions_batch(scaled_features, [raw_values])[0]
+
+    def explain_predictions_batch(
+        self,
+        scaled_features_batch: np.ndarray,
+        raw_values_list: List[Dict[str, float]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate SHAP explanations for many predictions with one explainer call.
+
+        Args:
+            scaled_features_batch: Nx8 numpy array (already scaled by StandardScaler)
+            raw_values_list: N dicts of original input values, in row order
+
+        Returns:
+            One explain_prediction()-style dict per row
+        """
         if not self._ensure_initialized():
-            return {'error': self.init_error}
+            return [{'error': self.init_error} for _ in raw_values_list]
 
         from services.ml_predictor import FEATURE_ORDER
 
-        shap_values = self.explainer.shap_values(scaled_features)
-
-        # SHAP output format depends on version:
-        # - Older: list of [class_0_array, class_1_array], each (n_samples, n_features)
-        # - Newer: ndarray of shape (n_samples, n_features, n_classes)
-        # We want class 1 (diabetes risk) contributions
-        shap_arr = np.array(shap_values)
-        if shap_arr.ndim == 3:
-            # Shape: (n_samples, n_features, n_classes)
-            contributions = shap_arr[0, :, 1]  # (8,) for class 1
-        elif isinstance(shap_values, list) and len(shap_values) == 2:
-            contributions = np.array(shap_values[1])[0]
-        else:
-            contributions = np.array(shap_values)[0]
+        contributions = self._class_1_contributions(scaled_features_batch)
 
         expected = self.explainer.expected_value
         if hasattr(expected, '__len__') and len(expected) > 1:
@@ -105,35 +131,72 @@ class ExplainabilityService:
         else:
             base_value = float(expected)
 
-        # Build the reverse mapping from feature name to input field name
-        feature_to_input = {v: k for k, v in INPUT_TO_FEATURE.items()}
+        # Compute each row's total absolute contribution for percentage calculation
+        abs_contributions = np.abs(contributions)
+        total_abs = abs_contributions.sum(axis=1, keepdims=True)
+        total_abs[total_abs == 0] = 1.0  # prevent division by zero
+        abs_pcts = abs_contributions / total_abs * 100
+
+        # Rounded for the response in one pass over the whole batch
+        rounded_shap = np.round(contributions, 4).tolist()
+        rounded_pcts = np.round(abs_pcts, 1).tolist()
+
+        return [
+            self._build_explanation(
+                FEATURE_ORDER, row, row_shap, row_pcts, raw_values, base_value
+            )
+            for row, row_shap, row_pcts, raw_values in zip(
+                contributions.tolist(), rounded_shap, rounded_pcts, raw_values_list
+            )
+        ]
+
+    def _class_1_contributions(self, scaled_features: np.ndarray) -> np.ndarray:
+        """Run SHAP and return class 1 (diabetes risk) contributions, shape (n_samples, n_features)."""
+        shap_values = self.explainer.shap_values(scaled_features)
+
+        # SHAP output format depends on version:
+        # - Older: list of [class_0_array, class_1_array], each (n_samples, n_features)
+        # - Newer: ndarray of shape (n_samples, n_features, n_classes)
+        if isinstance(shap_values, list) and len(shap_values) == 2:
+            contributions = np.asarray(shap_values[1], dtype=np.float64)
+        else:
+            contributions = np.asarray(shap_values, dtype=np.float64)
+            if contributions.ndim == 3:
+                contributions = contributions[:, :, 1]
 
-        # Compute total absolute contribution for percentage calculation
-        total_abs = float(np.sum(np.abs(contributions)))
-        if total_abs == 0:
-            total_abs = 1.0  # prevent division by zero
+        return contributions.reshape(-1, contributions.shape[-1])
 
+    def _build_explanation(
+        self,
+        feature_order: List[str],
+        contributions: List[float],
+        rounded_shap: List[float],
+        contribution_pcts: List[float],
+        raw_values: Dict[str, float],
+        base_value: float,
+    ) -> Dict[str, Any]:
+        """Assemble one row's explanation from its SHAP values and rounded percentages."""
         # Build feature contribution list
         feature_contributions: List[Dict[str, Any]] = []
-        for i, feature_name in enumerate(FEATURE_ORDER):
-            shap_val = float(contributions[i])
-            abs_pct = abs(shap_val) / total_abs * 100
+        for feature_name, shap_val, rounded_val, contribution_pct in zip(
+            feature_order, contributions, rounded_shap, contribution_pcts
+        ):
             direction = 'risk' if shap_val > 0 else 'protective'
 
             display = FEATURE_DISPLAY.get(feature_name, {'name': feature_name, 'unit': ''})
-            input_key = feature_to_input.get(feature_name, feature_name.lower())
+            input_key = FEATURE_TO_INPUT.get(feature_name, feature_name.lower())
             raw_val = raw_values.get(input_key, 0)
 
             # Generate plain English explanation
             explanation = self._generate_explanation(
-                display['name'], raw_val, display['unit'], direction, round(abs_pct, 1)
+                display['name'], raw_val, display['unit'], direction, contribution_pct
             )
 
             feature_contributions.append({
                 'feature': feature_name,
                 'display_name': display['name'],
-                'shap_value': round(shap_val, 4),
-                'contribution_pct': round(abs_pct, 1),
+                'shap_value': rounded_val,
+                'contribution_pct': contribution_pct,
                 'direction': direction,
                 'raw_value': raw_val,
                 'unit': display['unit'],
@@ -175,12 +238,18 @@ class ExplainabilityService:
         if not predictor.initialized:
             return {'error': 'Model not initialized'}
 
-        tree_predictions = []
-        for tree in predictor.model.estimators_:
-            tree_pred = tree.predict_proba(scaled_features)[0][1]
-            tree_predictions.append(tree_pred)
+        model = predictor.model
+        trees = self._get_forest_trees(model)
+
+        # Find each tree's leaf directly, skipping predict_proba's per-call
+        # validation; sklearn trees split on float32 features
+        features = np.ascontiguousarray(scaled_features, dtype=np.float32)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        tree_predictions = np.empty(len(trees), dtype=np.float64)
+        for i, (tree, leaf_risk) in enumerate(trees):
+            tree_predictions[i] = leaf_risk[tree.apply(features)[0]]
 
-        tree_predictions = np.array(tree_predictions)
         mean_pred = float(np.mean(tree_predictions))
         std_pred = float(np.std(tree_predictions))
 
@@ -197,9 +266,26 @@ class ExplainabilityService:
             'ci_lower_pct': round(ci_lower * 100, 1),
             'ci_upper_pct': round(ci_upper * 100, 1),
             'confidence_level': confidence_level,
-            'tree_count': len(predictor.model.estimators_),
+            'tree_count': len(trees),
         }
 
+    def _get_forest_trees(self, model) -> List[Any]:
+        """Return each tree's structure and per-node class 1 probability, built once per model."""
+        cached = self._forest_trees
+        if cached is None or cached[0] is not model:
+            with self._forest_trees_lock:
+                cached = self._forest_trees
+                if cached is None or cached[0] is not model:
+                    trees = []
+                    for estimator in model.estimators_:
+                        # Node values are class counts or fractions depending on the
+                        # sklearn version; normalizing gives predict_proba's class 1
+                        values = estimator.tree_.value[:, 0, :]
+                        trees.append((estimator.tree_, values[:, 1] / values.sum(axis=1)))
+                    cached = (model, trees)
+                    self._forest_trees = cached
+        return cached[1]
+
     def _generate_explanation(
         self, name: str, value: float, unit: str, direction: str, pct: float
     ) -> str:
@@ -250,11 +336,14 @@ class ExplainabilityService:
 
 # Singleton instance
 _explainability_instance: Optional[ExplainabilityService] = None
+_explainability_instance_lock = threading.Lock()
 
 
 def get_explainability_service() -> ExplainabilityService:
     """Get or create the explainability service singleton."""
     global _explainability_instance
     if _explainability_instance is None:
-        _explainability_instance = ExplainabilityService()
+        with _explainability_instance_lock:
+            if _explainability_instance is None:
+                _explainability_instance = ExplainabilityService()
     return _explainability_instance
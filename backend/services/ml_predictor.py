@@ -7,7 +7,9 @@ Diabetes Dataset.
 """
 
 import os
+import threading
 import joblib
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
@@ -54,6 +56,9 @@ VALIDATION_RANGES = {
     'diabetes_pedigree': {'min': 0, 'max': 3, 'name': 'Diabetes Pedigree Function'}
 }
 
+# Number of distinct feature vectors whose SHAP explanation is kept in memory
+EXPLANATION_CACHE_SIZE = 1024
+
 # Risk category thresholds
 RISK_THRESHOLDS = {
     'low': 0.30,      # Below 30%
@@ -273,13 +278,16 @@ def get_confidence_level(factors_provided: List[str], factors_missing: List[str]
 
 # Module-level predictor instance (loaded once)
 _predictor_instance = None
+_predictor_instance_lock = threading.Lock()
 
 
 def get_predictor() -> MLPredictor:
     """Get or create the ML predictor singleton."""
     global _predictor_instance
     if _predictor_instance is None:
-        _predictor_instance = MLPredictor()
+        with _predictor_instance_lock:
+            if _predictor_instance is None:
+                _predictor_instance = MLPredictor()
     return _predictor_instance
 
 
@@ -420,14 +428,10 @@ def predict_diabetes_risk_with_explanation(input_data: Dict[str, Any]) -> Dict[s
     if not result.get('success'):
         return result
 
-    predictor = get_predictor()
-
     # Validate and clean inputs (reuse existing logic)
     _, _, cleaned_data = validate_inputs(input_data)
 
     try:
-        import numpy as np
-
         # Reconstruct features in model order (same as predict_diabetes_risk)
         features = [
             cleaned_data.get('pregnancies', DEFAULT_VALUES['pregnancies']),
@@ -439,23 +443,19 @@ def predict_diabetes_risk_with_explanation(input_data: Dict[str, Any]) -> Dict[s
             cleaned_data.get('diabetes_pedigree', DEFAULT_VALUES['diabetes_pedigree']),
             cleaned_data['age']
         ]
-        features_array = np.array(features).reshape(1, -1)
-        scaled_features = predictor.scaler.transform(features_array)
 
-        # Get SHAP explanation
-        from services.explainability_service import get_explainability_service
-        explain_service = get_explainability_service()
-
-        explanation = explain_service.explain_prediction(
-            scaled_features, result['input_values']
-        )
-        confidence_interval = explain_service.compute_confidence_interval(
-            scaled_features
+        explanation, confidence_interval = _explain_cached(
+            tuple(features), tuple(sorted(result['input_values'].items()))
         )
 
         result['explanation'] = explanation
         result['confidence_interval'] = confidence_interval
 
+    except ExplanationUnavailable as e:
+        # Failures aren't cached, so a later request retries the explainer
+        result['explanation'] = e.explanation
+        result['confidence_interval'] = e.confidence_interval
+
     except Exception as e:
         # If explanation fails, still return the prediction
         result['explanation'] = {'error': f"Explanation unavailable: {str(e)}"}
@@ -464,6 +464,51 @@ def predict_diabetes_risk_with_explanation(input_data: Dict[str, Any]) -> Dict[s
     return result
 
 
+class ExplanationUnavailable(Exception):
+    """The explainer returned an error result for a feature vector."""
+
+    def __init__(self, explanation: Dict[str, Any], confidence_interval: Dict[str, Any]):
+        super().__init__(explanation.get('error') or confidence_interval.get('error'))
+        self.explanation = explanation
+        self.confidence_interval = confidence_interval
+
+
+@lru_cache(maxsize=EXPLANATION_CACHE_SIZE)
+def _explain_cached(
+    features: Tuple[float, ...],
+    input_values: Tuple[Tuple[str, Any], ...],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Compute the SHAP explanation and confidence interval for one feature vector.
+
+    Identical features always produce identical SHAP values and tree votes,
+    so results are memoized. The returned dicts are shared between callers
+    and must not be mutated.
+    """
+    import numpy as np
+    from services.explainability_service import get_explainability_service
+
+    predictor = get_predictor()
+    features_array = np.array(features).reshape(1, -1)
+    scaled_features = predictor.scaler.transform(features_array)
+
+    explain_service = get_explainability_service()
+    explanation = explain_service.explain_prediction(
+        scaled_features, dict(input_values)
+    )
+    confidence_interval = explain_service.compute_confidence_interval(
+        scaled_features
+    )
+    if 'error' in explanation or 'error' in confidence_interval:
+        # Raised rather than returned so lru_cache doesn't keep the failure
+        raise ExplanationUnavailable(explanation, confidence_interval)
+    return explanation, confidence_interval
+
+
+# Feature importances never change for a loaded model, so they are computed once
+_feature_importance_result: Optional[Dict[str, Any]] = None
+
+
 def get_feature_importance() -> Dict[str, Any]:
     """
     Get feature importance from the trained model.
@@ -471,6 +516,10 @@ def get_feature_importance() -> Dict[str, Any]:
     Returns:
         Dictionary with feature importance data
     """
+    global _feature_importance_result
+    if _feature_importance_result is not None:
+        return _feature_importance_result
+
     predictor = get_predictor()
 
     if not predictor.initialized:
@@ -496,11 +545,12 @@ def get_feature_importance() -> Dict[str, Any]:
                 reverse=True
             )
 
-            return {
+            _feature_importance_result = {
                 'success': True,
                 'feature_importance': dict(sorted_features),
                 'top_features': [f[0] for f in sorted_features[:3]]
             }
+            return _feature_importance_result
         else:
             return {
                 'success': False,
@@ -514,10 +564,13 @@ def get_feature_importance() -> Dict[str, Any]:
         }
 
 
+@lru_cache(maxsize=1)
 def get_prediction_thresholds() -> Dict[str, Any]:
     """
     Get the risk category thresholds.
 
+    Computed once per process; the returned dict is shared, so don't mutate it.
+
     Returns:
         Dictionary with threshold information
     """
@@ -544,10 +597,13 @@ def get_prediction_thresholds() -> Dict[str, Any]:
     }
 
 
+@lru_cache(maxsize=1)
 def get_input_requirements() -> Dict[str, Any]:
     """
     Get information about required and optional inputs.
 
+    Computed once per process; the returned dict is shared, so don't mutate it.
+
     Returns:
         Dictionary with input requirements
     """
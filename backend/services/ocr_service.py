@@ -9,9 +9,13 @@ PaddleOCR chosen for:
 
 import os
 import re
-from typing import Dict, List, Optional, Tuple, Any
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Any, Union
+import numpy as np
 from PIL import Image
-from paddleocr import PaddleOCR
 
 
 class OCRService:
@@ -53,6 +57,15 @@ class OCRService:
     # Maximum image dimension for performance
     MAX_IMAGE_DIMENSION = 2000
 
+    # Engine errors worth retrying (resource contention, allocator pressure);
+    # anything else is treated as a problem with the image itself
+    TRANSIENT_OCR_ERRORS = (RuntimeError, MemoryError)
+
+    # Attempts per image and exponential backoff between them, in seconds
+    OCR_RETRY_ATTEMPTS = 3
+    OCR_RETRY_BASE_DELAY = 0.05
+    OCR_RETRY_MAX_DELAY = 0.5
+
     def __init__(self):
         """Initialize PaddleOCR with English language support."""
         self.ocr = None
@@ -60,6 +73,9 @@ class OCRService:
         self.init_error = None
 
         try:
+            # Imported here so loading this module doesn't pull in PaddlePaddle
+            from paddleocr import PaddleOCR
+
             # Initialize PaddleOCR
             # use_angle_cls: detect text orientation
             # lang: language (en for English)
@@ -77,18 +93,24 @@ class OCRService:
             self.initialized = False
             self.init_error = f"PaddleOCR initialization failed: {str(e)}"
 
-    def preprocess_image(self, image_path: str) -> str:
+    def preprocess_image(self, image_path: str) -> Union[np.ndarray, str]:
         """
         Preprocess image before OCR.
 
+        The image is decoded and resized in memory and handed to PaddleOCR as
+        an array, so no intermediate file is written and read back.
+
         Args:
             image_path: Path to the image file
 
         Returns:
-            Path to preprocessed image (may be same as input if no changes needed)
+            BGR image array for PaddleOCR, or the original path if preprocessing fails
         """
         try:
             with Image.open(image_path) as img:
+                # Let the JPEG decoder downscale while decoding (never below the target size)
+                img.draft('RGB', (self.MAX_IMAGE_DIMENSION, self.MAX_IMAGE_DIMENSION))
+
                 # Convert to RGB if needed (PaddleOCR works best with RGB)
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
@@ -105,16 +127,35 @@ class OCRService:
                     new_height = int(height * ratio)
                     img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
-                # Save preprocessed image
-                preprocessed_path = image_path.rsplit('.', 1)[0] + '_preprocessed.png'
-                img.save(preprocessed_path, 'PNG')
-                return preprocessed_path
+                # PaddleOCR follows OpenCV's BGR channel order for array input
+                return np.ascontiguousarray(np.asarray(img)[:, :, ::-1])
 
         except Exception as e:
             # If preprocessing fails, return original path
             print(f"Image preprocessing warning: {e}")
             return image_path
 
+    def _run_ocr(self, image: Union[np.ndarray, str]) -> Any:
+        """
+        Run PaddleOCR, retrying transient engine failures with exponential backoff.
+
+        Args:
+            image: Preprocessed image array or image path
+
+        Returns:
+            Raw PaddleOCR result
+        """
+        delay = self.OCR_RETRY_BASE_DELAY
+        for attempt in range(1, self.OCR_RETRY_ATTEMPTS + 1):
+            try:
+                return self.ocr.ocr(image, cls=True)
+            except self.TRANSIENT_OCR_ERRORS as e:
+                if attempt == self.OCR_RETRY_ATTEMPTS:
+                    raise
+                print(f"OCR attempt {attempt} failed, retrying in {delay:.2f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.OCR_RETRY_MAX_DELAY)
+
     def extract_text(self, image_path: str) -> Dict[str, Any]:
         """
         Extract raw text from image.
@@ -142,14 +183,10 @@ class OCRService:
                 }
 
             # Preprocess image
-            processed_path = self.preprocess_image(image_path)
+            processed_image = self.preprocess_image(image_path)
 
             # Run OCR
-            result = self.ocr.ocr(processed_path, cls=True)
-
-            # Clean up preprocessed image if different from original
-            if processed_path != image_path and os.path.exists(processed_path):
-                os.remove(processed_path)
+            result = self._run_ocr(processed_image)
 
             # Extract text from result
             # PaddleOCR returns: [[[bbox, (text, confidence)], ...]]
@@ -181,12 +218,14 @@ class OCRService:
                 "text": ""
             }
 
-    def extract_text_with_positions(self, image_path: str) -> Dict[str, Any]:
+    def extract_text_with_positions(self, image_path: str,
+                                    processed_image: Union[np.ndarray, str, None] = None) -> Dict[str, Any]:
         """
         Extract text with bounding box positions from image.
 
         Args:
             image_path: Path to the image file
+            processed_image: Output of preprocess_image() if already computed
 
         Returns:
             Dictionary with text blocks including positions and confidence scores
@@ -208,14 +247,11 @@ class OCRService:
                 }
 
             # Preprocess image
-            processed_path = self.preprocess_image(image_path)
+            if processed_image is None:
+                processed_image = self.preprocess_image(image_path)
 
             # Run OCR
-            result = self.ocr.ocr(processed_path, cls=True)
-
-            # Clean up preprocessed image if different from original
-            if processed_path != image_path and os.path.exists(processed_path):
-                os.remove(processed_path)
+            result = self._run_ocr(processed_image)
 
             if not result or not result[0]:
                 return {
@@ -391,7 +427,8 @@ class OCRService:
         else:
             return 'mg/dL'
 
-    def extract_glucose_values(self, image_path: str) -> Dict[str, Any]:
+    def extract_glucose_values(self, image_path: str,
+                               processed_image: Union[np.ndarray, str, None] = None) -> Dict[str, Any]:
         """
         Extract glucose values from a lab report image.
 
@@ -400,6 +437,7 @@ class OCRService:
 
         Args:
             image_path: Path to the lab report image
+            processed_image: Output of preprocess_image() if already computed
 
         Returns:
             Dictionary containing:
@@ -408,7 +446,7 @@ class OCRService:
             - extraction_success: Boolean indicating success
         """
         # Get text with positions
-        ocr_result = self.extract_text_with_positions(image_path)
+        ocr_result = self.extract_text_with_positions(image_path, processed_image)
 
         if not ocr_result['success']:
             return {
@@ -506,6 +544,35 @@ class OCRService:
             "extraction_success": True
         }
 
+    def extract_glucose_values_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract glucose values from several lab report images.
+
+        PaddleOCR's ocr() takes a single image per call, so the images are run
+        back-to-back on the same warm engine. While one image is in OCR the
+        next one is decoded and resized on a helper thread (PIL releases the
+        GIL for most of that work), so preprocessing is off the critical path.
+
+        Args:
+            image_paths: Paths to the lab report images
+
+        Returns:
+            One extract_glucose_values() result per path, in the same order
+        """
+        if len(image_paths) <= 1 or not self.initialized:
+            return [self.extract_glucose_values(path) for path in image_paths]
+
+        results = []
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ocr-preprocess') as pool:
+            pending = pool.submit(self.preprocess_image, image_paths[0])
+            for i, path in enumerate(image_paths):
+                processed_image = pending.result()
+                if i + 1 < len(image_paths):
+                    pending = pool.submit(self.preprocess_image, image_paths[i + 1])
+                results.append(self.extract_glucose_values(path, processed_image))
+
+        return results
+
     def _fallback_extraction(self, text_blocks: List[Dict],
                              already_found: set) -> List[Dict]:
         """
@@ -557,15 +624,116 @@ class OCRService:
         return detected_values
 
 
+class OCRQueueFull(Exception):
+    """Raised when OCRBatchQueue already holds its maximum number of pending images."""
+
+
+class OCRBatchQueue:
+    """
+    Coalesces concurrent OCR requests into micro-batches for one worker thread.
+
+    Callers block in predict() while a background thread takes up to
+    batch_size images that are already queued; it never waits for a batch to
+    fill, since images are still recognized one at a time and waiting would
+    only add latency. PaddleOCR is not thread-safe, so this also keeps every
+    OCR call on a single thread when the app is served by a threaded WSGI server.
+    With max_pending set, predict() fails fast with OCRQueueFull instead of
+    letting the backlog (and request latency) grow without bound.
+    """
+
+    def __init__(self, batch_size: int = 8, max_pending: int = 0):
+        self.batch_size = batch_size
+        # maxsize 0 means unbounded
+        self._queue: 'queue.Queue[Tuple[str, Future]]' = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+
+    def _worker_running(self) -> bool:
+        # Threads do not survive fork(), so a worker started before a
+        # pre-forking server spawned this process does not count
+        return (
+            self._worker is not None
+            and self._worker_pid == os.getpid()
+            and self._worker.is_alive()
+        )
+
+    def _ensure_worker(self):
+        """Start the batch worker on first use in this process."""
+        if self._worker_running():
+            return
+
+        with self._lock:
+            if not self._worker_running():
+                self._worker = threading.Thread(
+                    target=self._run, name='ocr-batch-worker', daemon=True
+                )
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        """Block for one request, then take whatever else is already queued, up to batch_size."""
+        batch = [self._queue.get()]
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            image_paths = [path for path, _ in batch]
+
+            try:
+                results = get_ocr_service().extract_glucose_values_batch(image_paths)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def predict(self, image_path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Queue an image for OCR and wait for its result.
+
+        Args:
+            image_path: Path to the lab report image
+            timeout: Seconds to wait before giving up (None waits indefinitely)
+
+        Returns:
+            Same dictionary as extract_glucose_values()
+
+        Raises:
+            OCRQueueFull: max_pending images are already waiting
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((image_path, future))
+        except queue.Full:
+            raise OCRQueueFull(f"{self._queue.maxsize} images already waiting for OCR")
+        return future.result(timeout=timeout)
+
+
 # Singleton instance for use in the application
 _ocr_service_instance = None
+_ocr_service_instance_lock = threading.Lock()
 
 
 def get_ocr_service() -> OCRService:
     """Get or create the OCR service singleton."""
     global _ocr_service_instance
     if _ocr_service_instance is None:
-        _ocr_service_instance = OCRService()
+        # Loading PaddleOCR takes seconds; make concurrent first requests share one load
+        with _ocr_service_instance_lock:
+            if _ocr_service_instance is None:
+                _ocr_service_instance = OCRService()
     return _ocr_service_instance
 
 
@@ -586,3 +754,9 @@ def extract_glucose_values(image_path: str) -> Dict[str, Any]:
     """Extract glucose values from a lab report image."""
     service = get_ocr_service()
     return service.extract_glucose_values(image_path)
+
+
+def extract_glucose_values_batch(image_paths: List[str]) -> List[Dict[str, Any]]:
+    """Extract glucose values from several lab report images."""
+    service = get_ocr_service()
+    return service.extract_glucose_values_batch(image_paths)
@@ -7,8 +7,9 @@ analysis results, classifications, risk assessments, and SHAP explanations.
 
 import io
 import json
+import threading
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -105,17 +106,20 @@ def _get_styles():
 class PDFReportService:
     """Generate PDF reports from stored analyses."""
 
-    def generate_report(self, analysis: Dict[str, Any]) -> bytes:
+    def generate_report(
+        self, analysis: Dict[str, Any], out: Optional[BinaryIO] = None
+    ) -> Optional[bytes]:
         """
         Generate a PDF report from an analysis record.
 
         Args:
             analysis: Full analysis record from database (with parsed JSON)
+            out: Binary stream to write the PDF into (None = build in memory)
 
         Returns:
-            PDF file contents as bytes
+            PDF file contents as bytes, or None when written to ``out``
         """
-        buf = io.BytesIO()
+        buf = out if out is not None else io.BytesIO()
         doc = SimpleDocTemplate(
             buf,
             pagesize=A4,
@@ -176,6 +180,8 @@ class PDFReportService:
         )
 
         doc.build(story)
+        if out is not None:
+            return None
         return buf.getvalue()
 
     def _build_manual_section(self, story, styles, analysis, result_data):
@@ -350,10 +356,13 @@ class PDFReportService:
 
 # Singleton
 _pdf_instance: Optional[PDFReportService] = None
+_pdf_instance_lock = threading.Lock()
 
 
 def get_pdf_service() -> PDFReportService:
     global _pdf_instance
     if _pdf_instance is None:
-        _pdf_instance = PDFReportService()
+        with _pdf_instance_lock:
+            if _pdf_instance is None:
+                _pdf_instance = PDFReportService()
     return _pdf_instance
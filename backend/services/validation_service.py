@@ -6,6 +6,7 @@ Provides helpful feedback for incorrect report types.
 """
 
 import re
+from functools import lru_cache
 from typing import Dict, Any, List, Set
 
 
@@ -182,15 +183,30 @@ GLUCOSE_TEST_TYPES = {
 }
 
 
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=32)
 def _normalize_text(text: str) -> str:
-    """Normalize text for keyword matching."""
+    """
+    Normalize text for keyword matching.
+
+    Cached because comprehensive_validation() normalizes the same OCR text
+    for both report validation and test type detection.
+    """
     # Convert to lowercase
     text = text.lower()
     # Replace multiple spaces/newlines with single space
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_RE.sub(' ', text)
     return text
 
 
+@lru_cache(maxsize=None)
+def _word_pattern(keyword: str) -> 're.Pattern[str]':
+    """Compiled whole-word pattern for a short keyword (the keyword sets are fixed)."""
+    return re.compile(r'\b' + re.escape(keyword) + r'\b')
+
+
 def _find_keywords(text: str, keyword_set: Set[str]) -> List[str]:
     """
     Find all matching keywords in text.
@@ -207,8 +223,7 @@ def _find_keywords(text: str, keyword_set: Set[str]) -> List[str]:
         # Use word boundary matching for short keywords to avoid false positives
         if len(keyword) <= 3:
             # For short keywords like 'rbc', 'wbc', use word boundaries
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text):
+            if _word_pattern(keyword).search(text):
                 found.append(keyword)
         else:
             # For longer keywords, simple containment check
@@ -442,10 +457,13 @@ def get_rejection_message(detected_type: str) -> str:
     )
 
 
+@lru_cache(maxsize=1)
 def get_supported_report_types() -> Dict[str, Any]:
     """
     Get information about supported glucose test types.
 
+    Computed once per process; the returned dict is shared, so don't mutate it.
+
     Returns:
         Dictionary with supported test types and their descriptions
     """
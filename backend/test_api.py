@@ -8,12 +8,24 @@ Usage: python test_api.py
 """
 
 import requests
+import base64
 import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # API base URL
 BASE_URL = "http://localhost:5000"
 
+# OCR_MAX_PENDING the server was started with; the backlog test only runs when set
+OCR_MAX_PENDING = int(os.environ.get("OCR_MAX_PENDING", 0))
+
+# 1x1 white PNG; no report text, so only the job flow is checked
+BLANK_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4//8/AAX+Av4N70a4AAAAAElFTkSuQmCC"
+)
+
 # Test results tracking
 tests_passed = 0
 tests_failed = 0
@@ -470,6 +482,421 @@ def test_batch_input():
         return False
 
 
+def test_batch_stream_body():
+    """Test POST /api/manual-input/batch - Streamed body and up-front validation."""
+    print_header("Test 11: Batch Stream Body (POST /api/manual-input/batch)")
+
+    try:
+        payload = {
+            "readings": [
+                {"test_type": "fasting", "value": 105, "unit": "mg/dL"},
+                {"test_type": "unknown", "value": 100, "unit": "mg/dL"},
+                {"test_type": "hba1c", "value": 7.2, "unit": "%"}
+            ]
+        }
+
+        response = requests.post(
+            f"{BASE_URL}/api/manual-input/batch",
+            json=payload,
+            stream=True,
+            timeout=5
+        )
+        body = b"".join(response.iter_content(chunk_size=None))
+        data = json.loads(body)
+        results = data.get("results", [])
+
+        stream_passed = (
+            response.status_code == 200 and
+            data.get("success") == True and
+            data.get("input_count") == 3 and
+            len(results) == 3 and
+            "summary" in data and
+            "disclaimer" in data and
+            not any("disclaimer" in r for r in results)
+        )
+
+        print_result(
+            "Streamed body is one valid JSON document",
+            stream_passed,
+            f"{len(body)} bytes, {len(results)} results"
+        )
+
+        bad_payload = {"readings": [
+            {"test_type": "fasting", "value": 105, "unit": "mg/dL"},
+            {"test_type": 5, "value": 105, "unit": "mg/dL"}
+        ]}
+        response = requests.post(
+            f"{BASE_URL}/api/manual-input/batch",
+            json=bad_payload,
+            timeout=5
+        )
+        data = response.json()
+        validation_passed = response.status_code == 400 and data.get("success") == False
+
+        print_result(
+            "Non-string test_type rejected before streaming",
+            validation_passed,
+            f"Status: {response.status_code}"
+        )
+
+        return stream_passed and validation_passed
+
+    except Exception as e:
+        print_result("Batch stream body", False, str(e))
+        return False
+
+
+def test_history_cursor():
+    """Test GET /api/history - Cursor paging round-trip."""
+    print_header("Test 12: History Cursor Paging (GET /api/history?cursor=...)")
+
+    saved_ids = []
+    try:
+        for value in (95, 110, 130):
+            response = requests.post(
+                f"{BASE_URL}/api/save-analysis",
+                json={
+                    "analysis_type": "manual",
+                    "test_type": "fasting",
+                    "glucose_value": value,
+                    "classification": "Test",
+                    "label": "test_api cursor"
+                },
+                timeout=5
+            )
+            saved_ids.append(response.json().get("id"))
+
+        response = requests.get(f"{BASE_URL}/api/history?limit=2", timeout=5)
+        first_page = response.json()
+        cursor = first_page.get("next_cursor")
+
+        response = requests.get(
+            f"{BASE_URL}/api/history",
+            params={"limit": 2, "cursor": cursor},
+            timeout=5
+        )
+        second_page = response.json()
+
+        first_ids = [a["id"] for a in first_page.get("analyses", [])]
+        second_ids = [a["id"] for a in second_page.get("analyses", [])]
+
+        passed = (
+            response.status_code == 200 and
+            all(saved_ids) and
+            cursor is not None and
+            len(first_ids) == 2 and
+            len(second_ids) >= 1 and
+            not set(first_ids) & set(second_ids)
+        )
+
+        print_result(
+            "Cursor returns the next page without overlap",
+            passed,
+            f"Page 1: {len(first_ids)} rows, page 2: {len(second_ids)} rows"
+        )
+
+        response = requests.get(
+            f"{BASE_URL}/api/history",
+            params={"cursor": "not-a-cursor"},
+            timeout=5
+        )
+        invalid_passed = response.status_code == 400
+
+        print_result(
+            "Invalid cursor rejected",
+            invalid_passed,
+            f"Status: {response.status_code}"
+        )
+
+        return passed and invalid_passed
+
+    except Exception as e:
+        print_result("History cursor paging", False, str(e))
+        return False
+
+    finally:
+        for analysis_id in saved_ids:
+            if analysis_id:
+                requests.delete(f"{BASE_URL}/api/history/{analysis_id}", timeout=5)
+
+
+def test_history_stream():
+    """Test GET /api/history/stream - JSON array and NDJSON."""
+    print_header("Test 13: History Stream (GET /api/history/stream)")
+
+    try:
+        response = requests.get(f"{BASE_URL}/api/history/stream?limit=5", timeout=5)
+        rows = json.loads(response.content)
+
+        json_passed = (
+            response.status_code == 200 and
+            response.headers.get("Content-Type", "").startswith("application/json") and
+            isinstance(rows, list)
+        )
+
+        print_result(
+            "Default response is a JSON array",
+            json_passed,
+            f"{len(rows) if isinstance(rows, list) else 0} rows"
+        )
+
+        response = requests.get(
+            f"{BASE_URL}/api/history/stream?limit=5",
+            headers={"Accept": "application/x-ndjson"},
+            timeout=5
+        )
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+
+        ndjson_passed = (
+            response.status_code == 200 and
+            response.headers.get("Content-Type", "").startswith("application/x-ndjson") and
+            all(isinstance(row, dict) for row in lines)
+        )
+
+        print_result(
+            "NDJSON response has one object per line",
+            ndjson_passed,
+            f"{len(lines)} lines"
+        )
+
+        return json_passed and ndjson_passed
+
+    except Exception as e:
+        print_result("History stream", False, str(e))
+        return False
+
+
+def test_history_revalidation():
+    """Test GET /api/history - ETag and 304 Not Modified."""
+    print_header("Test 14: History Revalidation (If-None-Match)")
+
+    try:
+        response = requests.get(f"{BASE_URL}/api/history?limit=1", timeout=5)
+        etag = response.headers.get("ETag")
+
+        response = requests.get(
+            f"{BASE_URL}/api/history?limit=1",
+            headers={"If-None-Match": etag or ""},
+            timeout=5
+        )
+
+        passed = etag is not None and response.status_code == 304 and not response.content
+
+        print_result(
+            "Matching ETag returns 304",
+            passed,
+            f"ETag: {etag}, Status: {response.status_code}"
+        )
+
+        return passed
+
+    except Exception as e:
+        print_result("History revalidation", False, str(e))
+        return False
+
+
+def test_trends_group_by():
+    """Test GET /api/trends - Daily grouping."""
+    print_header("Test 15: Trends Grouping (GET /api/trends?group_by=day)")
+
+    try:
+        response = requests.get(f"{BASE_URL}/api/trends?group_by=day", timeout=5)
+        data = response.json()
+
+        day_passed = (
+            response.status_code == 200 and
+            data.get("success") == True and
+            "data_points" in data
+        )
+
+        print_result(
+            "group_by=day returns daily points",
+            day_passed,
+            f"{len(data.get('data_points', []))} days"
+        )
+
+        response = requests.get(f"{BASE_URL}/api/trends?group_by=week", timeout=5)
+        invalid_passed = response.status_code == 400
+
+        print_result(
+            "Unsupported group_by rejected",
+            invalid_passed,
+            f"Status: {response.status_code}"
+        )
+
+        return day_passed and invalid_passed
+
+    except Exception as e:
+        print_result("Trends grouping", False, str(e))
+        return False
+
+
+def test_msgpack_negotiation():
+    """Test GET /api/history - MessagePack content negotiation."""
+    print_header("Test 16: MessagePack Negotiation (Accept: application/msgpack)")
+
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/history?limit=1",
+            headers={"Accept": "application/msgpack"},
+            timeout=5
+        )
+
+        passed = (
+            response.status_code == 200 and
+            response.headers.get("Content-Type", "").startswith("application/msgpack") and
+            "Accept" in response.headers.get("Vary", "")
+        )
+
+        try:
+            import msgpack
+            data = msgpack.unpackb(response.content)
+            passed = passed and data.get("success") == True
+        except ImportError:
+            print("       msgpack not installed, skipping body decode")
+
+        print_result(
+            "History encoded as MessagePack",
+            passed,
+            f"Content-Type: {response.headers.get('Content-Type')}"
+        )
+
+        return passed
+
+    except Exception as e:
+        print_result("MessagePack negotiation", False, str(e))
+        return False
+
+
+def test_analyze_async():
+    """Test POST /api/analyze/async and GET /api/analyze/result/<job_id>."""
+    print_header("Test 17: Async Analysis (POST /api/analyze/async)")
+
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/analyze/async",
+            files={"file": ("blank.png", BLANK_PNG, "image/png")},
+            timeout=10
+        )
+        data = response.json()
+        job_id = data.get("job_id")
+
+        submit_passed = response.status_code == 202 and job_id is not None
+
+        print_result(
+            "Job accepted",
+            submit_passed,
+            f"Job: {job_id}"
+        )
+
+        result_passed = False
+        if submit_passed:
+            deadline = time.time() + 60
+            while time.time() < deadline:
+                response = requests.get(f"{BASE_URL}/api/analyze/result/{job_id}", timeout=5)
+                if response.status_code != 202:
+                    break
+                time.sleep(1)
+            result_passed = response.status_code not in (202, 404) and "success" in response.json()
+
+        print_result(
+            "Job result retrieved",
+            result_passed,
+            f"Status: {response.status_code}"
+        )
+
+        response = requests.get(f"{BASE_URL}/api/analyze/result/unknown-job", timeout=5)
+        missing_passed = response.status_code == 404
+
+        print_result(
+            "Unknown job returns 404",
+            missing_passed,
+            f"Status: {response.status_code}"
+        )
+
+        return submit_passed and result_passed and missing_passed
+
+    except Exception as e:
+        print_result("Async analysis", False, str(e))
+        return False
+
+
+def test_analyze_async_backlog():
+    """Test POST /api/analyze/async - 429 once OCR_MAX_PENDING jobs are outstanding."""
+    print_header("Test 18: Async Backlog Limit (POST /api/analyze/async)")
+
+    if not OCR_MAX_PENDING:
+        print("       Skipped: start the server and this script with a small OCR_MAX_PENDING, e.g. 2")
+        return True
+
+    def submit(_):
+        return requests.post(
+            f"{BASE_URL}/api/analyze/async?cache=off",
+            files={"file": ("blank.png", BLANK_PNG, "image/png")},
+            timeout=10
+        )
+
+    try:
+        attempts = OCR_MAX_PENDING * 4
+        with ThreadPoolExecutor(max_workers=attempts) as pool:
+            responses = list(pool.map(submit, range(attempts)))
+
+        statuses = [r.status_code for r in responses]
+        rejected = [r for r in responses if r.status_code == 429]
+
+        passed = (
+            set(statuses) <= {202, 429} and
+            len(rejected) > 0 and
+            all(r.json().get("success") == False for r in rejected)
+        )
+
+        print_result(
+            "Jobs over the backlog limit get 429",
+            passed,
+            f"Accepted: {statuses.count(202)}, rejected: {len(rejected)}"
+        )
+
+        return passed
+
+    except Exception as e:
+        print_result("Async backlog limit", False, str(e))
+        return False
+
+
+def test_oversized_upload():
+    """Test POST /api/upload and /api/analyze - Uploads over the size limit."""
+    print_header("Test 19: Oversized Upload (POST /api/upload, /api/analyze)")
+
+    # One byte over the server's 16MB MAX_CONTENT_LENGTH
+    oversized = BLANK_PNG + b"\0" * (16 * 1024 * 1024 + 1 - len(BLANK_PNG))
+    all_passed = True
+
+    for endpoint in ("/api/upload", "/api/analyze"):
+        try:
+            response = requests.post(
+                f"{BASE_URL}{endpoint}",
+                files={"file": ("large.png", oversized, "image/png")},
+                timeout=30
+            )
+            data = response.json()
+
+            passed = response.status_code == 413 and data.get("success") == False
+
+            print_result(
+                f"{endpoint} returns 413",
+                passed,
+                f"Status: {response.status_code}, Error: {data.get('error')}"
+            )
+
+        except Exception as e:
+            passed = False
+            print_result(f"{endpoint} returns 413", False, str(e))
+
+        all_passed = all_passed and passed
+
+    return all_passed
+
+
 def run_all_tests():
     """Run all API tests."""
     print("\n" + "=" * 60)
@@ -499,6 +926,15 @@ def run_all_tests():
     test_supported_tests()
     test_invalid_input()
     test_batch_input()
+    test_batch_stream_body()
+    test_history_cursor()
+    test_history_stream()
+    test_history_revalidation()
+    test_trends_group_by()
+    test_msgpack_negotiation()
+    test_analyze_async()
+    test_analyze_async_backlog()
+    test_oversized_upload()
 
     # Print summary
     print("\n" + "=" * 60)
@@ -51,7 +51,8 @@ export interface ClassificationResult {
     max: number;
   };
   recommendation: string;
-  disclaimer: string;
+  // Omitted from batch results, which carry one top-level disclaimer
+  disclaimer?: string;
 }
 
 // ============================================
@@ -130,6 +131,7 @@ export interface AnalyzeResponse {
   classifications: ClassificationWithDetection[];
   summary: string;
   analysis_timestamp?: string;
+  disclaimer?: string;
   error?: string;
   message?: string;
 }